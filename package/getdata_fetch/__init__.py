@@ -1,3 +1,5 @@
+import logging
+
 from . import (
     getdata_dem,
     getdata_radiometric,
@@ -6,3 +8,6 @@ from . import (
     settingshandler,
     utils,
 )
+
+# library logging: records go nowhere until the application configures a handler
+logging.getLogger(__name__).addHandler(logging.NullHandler())
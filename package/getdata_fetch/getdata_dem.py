@@ -1,36 +1,142 @@
 import json
 import logging
 import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from importlib import resources
+from types import MappingProxyType
 
-import rioxarray
+import numpy as np
+import rasterio
+import requests
+import rioxarray  # noqa: F401 - registers the .rio accessor used by dem_harvest_global
 from odc.stac import configure_rio, stac_load
-from owslib.wcs import WebCoverageService
 from pystac_client import Client
-from rasterio.io import MemoryFile
-
-from geodata_fetch.utils import retry_decorator
+from rasterio import shutil as rio_shutil
+from rasterio.enums import Resampling
+from rasterio.merge import merge
+from rasterio.vrt import WarpedVRT
+from rasterio.windows import Window, from_bounds
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from geodata_fetch.utils import wcs_base_url
+
+logger = logging.getLogger(__name__)
+
+# coalesce adjacent range requests and fetch larger blocks when reading the remote COGs,
+# and don't probe for sidecar files (.aux.xml, .ovr, .msk) that the COGs never have
+configure_rio(
+    cloud_defaults=True,
+    aws={"aws_unsigned": True},
+    GDAL_HTTP_MERGE_CONSECUTIVE_RANGES="YES",
+    CPL_VSIL_CURL_CHUNK_SIZE="2000000",
+    GDAL_INGESTED_BYTES_AT_OPEN="16384",
+    GDAL_HTTP_MULTIPLEX="YES",
+    GDAL_HTTP_VERSION="2",
+    GDAL_DISABLE_READDIR_ON_OPEN="EMPTY_DIR",
+    CPL_VSIL_CURL_ALLOWED_EXTENSIONS=".tif,.tiff",
+    VSI_CACHE="TRUE",
+    VSI_CACHE_SIZE="536870912",
+)
+os.environ["AWS_NO_SIGN_REQUEST"] = "YES"
 
-logger = logging.getLogger()
-# try this but remove if it doesn't work well with datadog:
-logging.basicConfig(
-    level=logging.ERROR, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# layer downloads are network-bound, so they run in a small thread pool
+MAX_WORKERS = 8
+
+# items requested per STAC /search page
+STAC_PAGE_LIMIT = 1000
+
+# threads stac_load uses to read the cop-dem-glo-30 tiles concurrently
+STAC_LOAD_WORKERS = 16
+
+# Coverages predicted to be larger than MAX_COVERAGE_PX pixels are requested as
+# TILE_PX x TILE_PX sub-tiles and merged locally, so no single GetCoverage is huge.
+TILE_PX = 1024
+MAX_COVERAGE_PX = 4096 * 4096
+
+# creation options for the DEM outputs; the COG driver builds the 512px internal tiles and
+# power-of-two overviews itself. The elevations are float32, so they use the floating
+# point predictor, and IF_SAFER switches to BigTIFF before a large AoI passes 4GB.
+DEM_COG_OPTIONS = dict(
+    driver="COG",
+    compress="DEFLATE",
+    predictor=3,
+    blocksize=512,
+    overview_resampling="average",
+    BIGTIFF="IF_SAFER",
+    num_threads="all_cpus",
 )
 
-configure_rio(cloud_defaults=True, aws={"aws_unsigned": True})
-os.environ["AWS_NO_SIGN_REQUEST"] = "YES"
+# Elevations (~-500 to 9000 m) fit in int16 at 1 m precision, which halves the output.
+# Integers compress best with the horizontal-differencing predictor.
+INT16_NODATA = -32768
+DEM_INT16_COG_OPTIONS = dict(DEM_COG_OPTIONS, predictor=2)
+
+# number of downloaded coverages each dem_harvest keeps for reuse by later requests
+TILE_CACHE_SIZE = 64
+# how far (as a fraction of a pixel) a requested bbox edge may sit from a cached pixel edge
+# and still be cut from the cached coverage; this only absorbs float noise
+CACHE_ALIGN_TOL = 1e-3
+
+
+@lru_cache(maxsize=None)
+def _load_config(config_filename):
+    """
+    Parse a packaged harvester config once per process.
+    The result is read-only since it is shared by every harvester instance.
+    """
+    with resources.open_text("data", config_filename) as f:
+        return MappingProxyType(json.load(f))
+
+
+def _tile_bbox(bbox, resolution, tile_px=TILE_PX):
+    """
+    Split a bbox into sub-bboxes of at most tile_px x tile_px pixels at the given
+    resolution (in bbox units). Tiles are aligned to the bbox origin so they meet
+    without gaps or overlap.
+    """
+    minx, miny, maxx, maxy = bbox
+    step = tile_px * resolution
+    for x0 in np.arange(minx, maxx, step):
+        for y0 in np.arange(miny, maxy, step):
+            yield (x0, y0, min(x0 + step, maxx), min(y0 + step, maxy))
+
+
+def _cached_window(transform, width, height, bbox):
+    """
+    Window of bbox in a cached coverage, or None unless every bbox edge lies on a pixel edge
+    of the coverage (to within CACHE_ALIGN_TOL of a pixel) and inside it. A crop is then the
+    exact pixels a fresh request for bbox would return, not a resample onto another grid.
+    """
+    window = from_bounds(*bbox, transform=transform)
+    edges = (
+        window.col_off,
+        window.row_off,
+        window.col_off + window.width,
+        window.row_off + window.height,
+    )
+    snapped = [round(edge) for edge in edges]
+    if any(abs(edge - snap) > CACHE_ALIGN_TOL for edge, snap in zip(edges, snapped)):
+        return None
+    col_start, row_start, col_stop, row_stop = snapped
+    if not (0 <= col_start < col_stop <= width and 0 <= row_start < row_stop <= height):
+        return None
+    return Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
 
 
 class _BaseHarvest:
     def __init__(self, config_filename):
         try:
-            with resources.open_text("data", config_filename) as f:
-                config_json = json.load(f)
-            self.initialise_attributes_from_json(config_json)
+            self.initialise_attributes_from_json(_load_config(config_filename))
         except Exception as e:
             logger.error(
                 f"Error loading {config_filename} to {self.__class__.__name__} module.",
-                exec_info=True,
+                exc_info=True,
             )
             raise ValueError(
                 f"Error loading {config_filename} to {self.__class__.__name__} module: {e}"
@@ -48,15 +154,105 @@ class _BaseHarvest:
         self.resolution_arcsec = config_json.get("resolution_arcsec", None)
         self.resolution_metre = config_json.get("resolution_metre", None)
         self.layers_url = config_json.get("layers_url")
+        # copy the nested values so instances can't mutate the cached config
+        if isinstance(self.bbox, list):
+            self.bbox = list(self.bbox)
+        if isinstance(self.layers_url, dict):
+            self.layers_url = dict(self.layers_url)
         self.fetched_files = []
 
 
 class dem_harvest(_BaseHarvest):
     def __init__(self):
         super().__init__("australia_dem_default_config.json")
-
-    @retry_decorator()
-    def getwcs_dem(self, url, crs, resolution, bbox, property_name, outpath):
+        self._session = self._make_session()
+        # LRU of coverages already downloaded by this harvester, keyed on the exact request
+        # (url, crs, resolution, bbox) -> (cached file, its transform, width, height)
+        self._tile_cache = OrderedDict()
+        self._tile_cache_lock = threading.Lock()
+        self._tile_cache_dir = tempfile.TemporaryDirectory(prefix="geodata_fetch_dem_")
+
+    @staticmethod
+    def _make_session():
+        """
+        Build the pooled session used for all WCS requests from this harvester, so repeated
+        layer/property calls reuse keep-alive connections. The adapter also retries
+        transient gateway errors with exponential backoff.
+        """
+        session = requests.Session()
+        session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=16,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.5,
+                    status_forcelist=[502, 503, 504],
+                    raise_on_status=False,
+                ),
+            ),
+        )
+        return session
+
+    def _cache_lookup(self, url, crs, resolution, bbox):
+        """
+        Return (cached file, window) for a cached coverage that can serve bbox, or None.
+        The same request again is served whole; otherwise a coverage from the same url, crs
+        and resolution is used only if bbox falls inside it on its own pixel grid.
+        """
+        key = (url, crs, resolution, tuple(bbox))
+        with self._tile_cache_lock:
+            if key in self._tile_cache:
+                self._tile_cache.move_to_end(key)
+                path, _, width, height = self._tile_cache[key]
+                return path, Window(0, 0, width, height)
+            for c_key, (path, transform, width, height) in self._tile_cache.items():
+                if c_key[:3] != key[:3]:
+                    continue
+                window = _cached_window(transform, width, height, bbox)
+                if window is not None:
+                    self._tile_cache.move_to_end(c_key)
+                    return path, window
+        return None
+
+    def _cache_store(self, url, crs, resolution, bbox, fname):
+        """
+        Keep a copy of a downloaded coverage, evicting the least recently used one if the
+        cache is full.
+        """
+        fd, path = tempfile.mkstemp(dir=self._tile_cache_dir.name, suffix=".tiff")
+        os.close(fd)
+        shutil.copyfile(fname, path)
+        with rasterio.open(path) as src:
+            grid = (src.transform, src.width, src.height)
+        with self._tile_cache_lock:
+            self._tile_cache[(url, crs, resolution, tuple(bbox))] = (path, *grid)
+            while len(self._tile_cache) > TILE_CACHE_SIZE:
+                _, (evicted, *_) = self._tile_cache.popitem(last=False)
+                os.remove(evicted)
+
+    @staticmethod
+    def _crop_cached(cached_path, window, outpath):
+        """
+        Write a window of a cached coverage to a temporary GeoTIFF in outpath.
+        """
+        with rasterio.open(cached_path) as src:
+            profile = src.profile
+            profile.update(
+                width=window.width,
+                height=window.height,
+                transform=src.window_transform(window),
+            )
+            fd, path = tempfile.mkstemp(dir=outpath, suffix=".tiff")
+            os.close(fd)
+            with rasterio.open(path, "w", **profile) as dst:
+                dst.write(src.read(window=window))
+        return path
+
+    def getwcs_dem(
+        self, url, crs, resolution, bbox, property_name, outpath, tile_size=None
+    ):
         """
         Downloads a Digital Elevation Model (DEM) using the Web Coverage Service (WCS) protocol.
 
@@ -67,55 +263,181 @@ class dem_harvest(_BaseHarvest):
             bbox (tuple): The bounding box of the requested data in the format (minx, miny, maxx, maxy).
             property_name (str): The name of the property associated with the DEM.
             outpath (str): The output directory where the downloaded DEM will be saved.
+            tile_size (int, optional): Split the request into sub-tiles of this many pixels
+                per side, fetched in parallel and merged. Defaults to None, which only tiles
+                when the predicted coverage exceeds MAX_COVERAGE_PX.
 
         Returns:
-            data array containing pixels
+            str: Path of a temporary GeoTIFF in outpath holding the coverage. The caller is
+            responsible for removing it.
 
         Raises:
-            ServiceException: If the WCS server returns an exception.
+            ValueError: If the WCS server returns a service exception report.
             HTTPError: If there is an HTTP error while accessing the WCS server.
             Exception: If there is a general error while downloading the DEM.
 
         """
-        try:
-            if resolution is None:
-                resolution = self.resolution_arcsec
+        if resolution is None:
+            resolution = self.resolution_arcsec
 
-            wcs = WebCoverageService(url, version="1.0.0", timeout=600)
-            # layername is handled differently here compared to SLGA due to structure of the endpoint
-            # layername = wcs["1"].title
-            # fname_out = layername.replace(" ", "_") + "_" + property_name + ".tiff"
-            # outfname = os.path.join(outpath, fname_out)
+        os.makedirs(outpath, exist_ok=True)
 
-            os.makedirs(outpath, exist_ok=True)
+        # overlapping requests (e.g. neighbouring properties) reuse earlier downloads
+        cached = self._cache_lookup(url, crs, resolution, bbox)
+        if cached is not None:
+            logger.info(f"Reusing cached DEM coverage for bbox {bbox}")
+            return self._crop_cached(*cached, outpath)
+
+        fname = self._download_coverage(url, crs, resolution, bbox, outpath, tile_size)
+        self._cache_store(url, crs, resolution, bbox, fname)
+        return fname
 
-            data = wcs.getCoverage(
-                identifier="1",
-                bbox=bbox,
-                format="GeoTIFF",
-                crs=crs,
-                resx=resolution,
-                resy=resolution,
+    def _download_coverage(self, url, crs, resolution, bbox, outpath, tile_size):
+        """
+        Fetch a coverage as a single GetCoverage or, for large or tiled requests, as
+        parallel sub-tiles merged into one temporary GeoTIFF.
+        """
+        if tile_size is None:
+            n_pixels = ((bbox[2] - bbox[0]) / resolution) * (
+                (bbox[3] - bbox[1]) / resolution
             )
-        except Exception as e:
-            if e.response.status_code == 502:
-                logger.error(
-                    f"HTTPError 502: Bad Gateway encountered when accessing {url}",
-                    exec_info=True,
+            if n_pixels <= MAX_COVERAGE_PX:
+                return self._getcoverage(url, crs, resolution, bbox, outpath)
+            tile_size = TILE_PX
+
+        sub_bboxes = list(_tile_bbox(bbox, resolution, tile_size))
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_WORKERS, len(sub_bboxes))
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self._getcoverage, url, crs, resolution, sub_bbox, outpath
                 )
-            elif e.response.status_code == 503:
-                logger.error(
-                    f"HTTPError 503: Service Unavailable encountered when accessing {url}",
-                    exec_info=True,
-                )
-            else:
-                logger.error(
-                    f"Error {e.response.status_code}: {e.response.reason} when accessing {url}",
-                    exec_info=True,
-                )
-        return data.read()  # outfname
+                for sub_bbox in sub_bboxes
+            ]
+        tiles = []
+        try:
+            # wait on every tile before raising so none of the temp files are leaked
+            errors = []
+            for future in futures:
+                try:
+                    tiles.append(future.result())
+                except Exception as e:
+                    errors.append(e)
+            if errors:
+                raise errors[0]
+
+            fd, merged = tempfile.mkstemp(dir=outpath, suffix=".tiff")
+            os.close(fd)
+            merge(tiles, bounds=bbox, res=resolution, dst_path=merged)
+            return merged
+        finally:
+            for tile in tiles:
+                os.remove(tile)
+
+    def _getcoverage(self, url, crs, resolution, bbox, outpath):
+        """
+        Issue a single WCS GetCoverage request and stream the result to a temporary GeoTIFF
+        in outpath, returning its path.
+        """
+        # GetCoverage is sent straight through the pooled session rather than owslib, which
+        # would open a new connection (and fetch the capabilities again) on every call.
+        # layername is handled differently here compared to SLGA due to structure of the endpoint
+        params = {
+            "SERVICE": "WCS",
+            "VERSION": "1.0.0",
+            "REQUEST": "GetCoverage",
+            "COVERAGE": "1",
+            "CRS": crs,
+            "BBOX": ",".join(str(coord) for coord in bbox),
+            "FORMAT": "GeoTIFF",
+            "RESX": resolution,
+            "RESY": resolution,
+        }
+        try:
+            with self._session.get(
+                wcs_base_url(url), params=params, timeout=600, stream=True
+            ) as response:
+                response.raise_for_status()
+                # the server reports errors as an XML ServiceExceptionReport
+                if "xml" in response.headers.get("Content-Type", ""):
+                    raise ValueError(
+                        f"WCS service exception from {url}: {response.text}"
+                    )
+                # stream the coverage to disk in chunks so the payload is never held in memory
+                with tempfile.NamedTemporaryFile(
+                    dir=outpath, suffix=".tiff", delete=False
+                ) as f:
+                    try:
+                        for chunk in response.iter_content(chunk_size=1024 * 1024):
+                            f.write(chunk)
+                    except Exception:
+                        f.close()
+                        os.remove(f.name)
+                        raise
+        except requests.HTTPError as e:
+            logger.error(
+                f"Error {e.response.status_code}: {e.response.reason} when accessing {url}",
+                exc_info=True,
+            )
+            raise
+        return f.name
+
+    def _fetch_one(
+        self, layername, property_name, bbox, resolution, outpath, as_int16=False
+    ):
+        """
+        Download, reproject and save a single DEM layer. With as_int16 the elevations are
+        rounded to whole metres and stored as int16 with a nodata of INT16_NODATA.
+
+        Returns:
+            str: The output file name, or None if the layer name isn't handled.
+        """
+        if layername != "DEM":
+            return None
 
-    def get_dem_layers(self, property_name, layernames, bbox, crs, outpath):
+        tmpfname = self.getwcs_dem(
+            url=self.layers_url["DEM"],
+            crs=self.crs,
+            resolution=resolution,
+            bbox=bbox,
+            property_name=property_name,
+            outpath=outpath,
+        )
+        fname_out = f"DEM_SRTM_1_Second_Hydro_Enforced_{property_name}.tiff"
+        outfname = os.path.join(outpath, fname_out)
+
+        # take the downlaoded data, project it to correct CRS and save:
+        # the warp runs through a WarpedVRT so it is streamed block by block straight into
+        # the COG writer, instead of materialising the reprojected array first
+        try:
+            with rasterio.open(tmpfname) as src:
+                # reprojection is a full resample, so skip it if the data is already in 3857
+                if not as_int16 and src.crs is not None and src.crs.to_epsg() == 3857:
+                    rio_shutil.copy(src, outfname, **DEM_COG_OPTIONS)
+                elif as_int16:
+                    # the warper rounds and clamps to the int16 range as it narrows
+                    with WarpedVRT(
+                        src,
+                        crs="EPSG:3857",
+                        resampling=Resampling.nearest,
+                        dtype="int16",
+                        nodata=INT16_NODATA,
+                    ) as vrt:
+                        rio_shutil.copy(vrt, outfname, **DEM_INT16_COG_OPTIONS)
+                else:
+                    with WarpedVRT(
+                        src, crs="EPSG:3857", resampling=Resampling.nearest
+                    ) as vrt:
+                        rio_shutil.copy(vrt, outfname, **DEM_COG_OPTIONS)
+                logger.info(f"Reprojected WCS data saved as {fname_out}")
+        finally:
+            os.remove(tmpfname)
+        return outfname
+
+    def get_dem_layers(
+        self, property_name, layernames, bbox, crs, outpath, as_int16=False
+    ):
         """
         Fetches DEM layers based on the provided parameters.
 
@@ -124,6 +446,9 @@ class dem_harvest(_BaseHarvest):
             layernames (str or list): The name(s) of the DEM layer(s) to fetch.
             bbox (tuple): The bounding box coordinates (xmin, ymin, xmax, ymax).
             outpath (str): The output path to save the fetched layers.
+            as_int16 (bool, optional): Store the elevations rounded to whole metres as int16,
+                halving the file size. Defaults to False, since the metre steps show up in
+                slope/aspect derived from the DEM.
 
         Returns:
             list: A list of file names of the fetched DEM layers.
@@ -143,29 +468,16 @@ class dem_harvest(_BaseHarvest):
             """
             resolution = self.resolution_metre
 
-            fnames_out = []
-            for layername in layernames:
-                if layername == "DEM":
-                    data = self.getwcs_dem(
-                        url=self.layers_url["DEM"],
-                        crs=self.crs,
-                        resolution=resolution,
-                        bbox=bbox,
-                        property_name=property_name,
-                        outpath=outpath,
-                    )
-                    fname_out = f"DEM_SRTM_1_Second_Hydro_Enforced_{property_name}.tiff"
-                    outfname = os.path.join(outpath, fname_out)
-
-                    # take the downlaoded data, project it to correct CRS and save:
-                    # Load data into rioxarray, reproject, and save
-                    with MemoryFile(data) as memfile:
-                        with memfile.open() as src:
-                            rxr = rioxarray.open_rasterio(src, masked=True)
-                            rxr_reprojected = rxr.rio.reproject("EPSG:3857")
-                            rxr_reprojected.rio.to_raster(outfname)
-                            fnames_out.append(outfname)
-                            logger.info(f"Reprojected WCS data saved as {fname_out}")
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(MAX_WORKERS, len(layernames)))
+            ) as executor:
+                results = executor.map(
+                    lambda layername: self._fetch_one(
+                        layername, property_name, bbox, resolution, outpath, as_int16
+                    ),
+                    layernames,
+                )
+                fnames_out = [outfname for outfname in results if outfname is not None]
 
             return fnames_out
         except Exception as e:
@@ -181,50 +493,69 @@ class dem_harvest_global(_BaseHarvest):
     def __init__(self):
         super().__init__("stac_global_dem_default_config.json")
 
+    def _fetch_one(self, layername, property_name, bbox, outpath):
+        """
+        Load a single global DEM layer from the STAC catalogue and save it as a COG.
+
+        Returns:
+            str: The output file name, or None if the layer name isn't handled.
+        """
+        if layername != "DEM Global":
+            return None
+
+        fname_out = (
+            layername.replace(" ", "_") + "_COP_30_GLO_" + property_name + ".tiff"
+        )
+
+        outfname = os.path.join(outpath, fname_out)
+        """
+        There are some oddities with handling CRS here. The stac items need to be passed to stac_load_xarray as a SPATIAL reference system (3857) but our final stored data expects a  CARTESIAN system (4326). So, we need to do a reproject after downloading the data.
+        """
+        resolution = 30
+        collections = ["cop-dem-glo-30"]
+
+        """
+        not sure if importing gis_utils stac was causing a problem, so I've hardcoded in here for now.
+        """
+        catalog = Client.open(self.source_url)
+        # a large page size keeps a big AoI to one or two /search round-trips
+        query = catalog.search(
+            collections=collections, bbox=bbox, limit=STAC_PAGE_LIMIT, max_items=None
+        )
+        items = query.item_collection()
+
+        stac_load_xarray = stac_load(
+            items,
+            crs="epsg:3857",
+            resolution=resolution,
+            bbox=bbox,
+            pool=STAC_LOAD_WORKERS,
+        )  # only squeeze if you KNOW there is only one time dimension
+        # print("checkpoint before memory load of dem")
+        stac_load_xarray = stac_load_xarray.squeeze()
+        xarray_data = stac_load_xarray.data
+
+        # stac_load has already read the pixels (it is not dask-backed), so there is no
+        # .load() to do here
+        xarray_data.rio.to_raster(outfname, **DEM_COG_OPTIONS)
+        return outfname
+
     def get_global_stac_dem(self, property_name, layernames, bbox, outpath):
         if not isinstance(layernames, list):
             layernames = [layernames]
         try:
             os.makedirs(outpath, exist_ok=True)
 
-            fnames_out = []
-            for layername in layernames:
-                if layername == "DEM Global":
-                    fname_out = (
-                        layername.replace(" ", "_")
-                        + "_COP_30_GLO_"
-                        + property_name
-                        + ".tiff"
-                    )
-
-                    outfname = os.path.join(outpath, fname_out)
-                    """
-                    There are some oddities with handling CRS here. The stac items need to be passed to stac_load_xarray as a SPATIAL reference system (3857) but our final stored data expects a  CARTESIAN system (4326). So, we need to do a reproject after downloading the data.
-                    """
-                    resolution = 30
-                    collections = ["cop-dem-glo-30"]
-
-                    """
-                    not sure if importing gis_utils stac was causing a problem, so I've hardcoded in here for now.
-                    """
-                    catalog = Client.open(self.source_url)
-                    query = catalog.search(collections=collections, bbox=bbox)
-                    items = list(query.items())
-
-                    stac_load_xarray = stac_load(
-                        items,
-                        crs="epsg:3857",
-                        resolution=resolution,
-                        bbox=bbox,
-                        chunksize=(1024, 1024),
-                    )  # only squeeze if you KNOW there is only one time dimension
-                    # print("checkpoint before memory load of dem")
-                    stac_load_xarray = stac_load_xarray.squeeze()
-                    stac_load_xarray = stac_load_xarray.load()
-                    xarray_data = stac_load_xarray.data
-
-                    final_raster = xarray_data.rio.to_raster(outfname, driver="COG")
-                    fnames_out.append(final_raster)
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(MAX_WORKERS, len(layernames)))
+            ) as executor:
+                results = executor.map(
+                    lambda layername: self._fetch_one(
+                        layername, property_name, bbox, outpath
+                    ),
+                    layernames,
+                )
+                fnames_out = [outfname for outfname in results if outfname is not None]
             return fnames_out
         except Exception as e:
             logger.error(
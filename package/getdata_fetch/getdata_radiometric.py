@@ -1,34 +1,80 @@
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
 from importlib import resources
+from types import MappingProxyType
 
-from owslib.wcs import WebCoverageService
+import requests
 
-from geodata_fetch.utils import retry_decorator
+from geodata_fetch import utils
+from geodata_fetch.utils import retry_decorator, wcs_base_url
 
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
+
+# radiometric layers are fetched from one WCS endpoint, so a small thread pool overlaps
+# the round-trips without hammering the server
+MAX_WORKERS = 8
+
+# shared across the worker threads so coverage requests reuse open connections
+_SESSION = requests.Session()
+
+
+# timeout (s) for fetching the capabilities document, which is cached (and expired) by
+# utils._get_wcs alongside every other source's
+CAPABILITIES_TIMEOUT = 300
+
+
+_CONFIG_KEYS = (
+    "title",
+    "description",
+    "license",
+    "source_url",
+    "copyright",
+    "attribution",
+    "crs",
+    "resolution_arcsec",
+    "layers_url",
+    "layer_names",
+)
+
+
+@lru_cache(maxsize=1)
+def _load_radiometric_config():
+    """
+    Parse the packaged radiometric config once per process.
+    The result is read-only since it is shared by every caller.
+    """
+    with resources.open_text("data", "radiometric_default_config.json") as f:
+        rm_json = json.load(f)
+    return MappingProxyType({key: rm_json[key] for key in _CONFIG_KEYS})
+
+
+def _getcoverage_url(url):
+    # the GetCoverage endpoint advertised in the capabilities, as owslib would use
+    methods = (
+        utils._get_wcs(url, timeout=CAPABILITIES_TIMEOUT, ttl_hash=utils._ttl_hash())
+        .getOperationByName("GetCoverage")
+        .methods
+    )
+    endpoint = next(
+        (m["url"] for m in methods if m.get("type", "").lower() == "get"), url
+    )
+    return wcs_base_url(endpoint)
+
+
+def _pixel_size(bbox, resolution):
+    # Convert resolution (arcsec) into width and height pixel number
+    width = abs(bbox[2] - bbox[0])
+    height = abs(bbox[3] - bbox[1])
+    return int(width / resolution * 3600), int(height / resolution * 3600)
 
 
 def get_radiometricdict():
     try:
-        with resources.open_text("data", "radiometric_default_config.json") as f:
-            rm_json = json.load(f)
-
-        rmdict = {}
-        rmdict["title"] = rm_json["title"]
-        rmdict["description"] = rm_json["description"]
-        rmdict["license"] = rm_json["license"]
-        rmdict["source_url"] = rm_json["source_url"]
-        rmdict["copyright"] = rm_json["copyright"]
-        rmdict["attribution"] = rm_json["attribution"]
-        rmdict["crs"] = rm_json["crs"]
-        rmdict["resolution_arcsec"] = rm_json["resolution_arcsec"]
-        rmdict["layers_url"] = rm_json["layers_url"]
-        rmdict["layer_names"] = rm_json["layer_names"]
-
-        return rmdict
+        return dict(_load_radiometric_config())
     except Exception as e:
         logger.error("Error loading radiometric.json", extra=dict({"error": str(e)}))
         return None
@@ -72,27 +118,50 @@ def get_radiometric_layers(property_name, layernames, bbox, outpath):
     if type(layernames) != list:
         layernames = [layernames]
 
-    # Loop over all layers
-    fnames_out = []
-    for layername in layernames:
-        outfname = os.path.join(
+    # every layer shares the bbox and resolution, so the output size is worked out once
+    size = _pixel_size(bbox, resolution)
+
+    # There is only one time available per layer; look them all up from a single
+    # capabilities document rather than one per layer
+    wcs = utils._get_wcs(url, timeout=CAPABILITIES_TIMEOUT, ttl_hash=utils._ttl_hash())
+    dates = {layername: wcs[layername].timepositions[0] for layername in layernames}
+
+    # The layer downloads are independent network-bound requests to the same endpoint,
+    # so they are run concurrently; results keep the layer order.
+    outfnames = [
+        os.path.join(
             outpath, "radiometric_" + layername + "_" + property_name + ".tiff"
         )
-        ok = get_radiometric_image(
-            outfname=outfname,
-            layername=layername,
-            bbox=bbox,
-            url=url,
-            resolution=resolution,
-            crs=crs,
-        )
-        if ok:
-            fnames_out.append(outfname)
+        for layername in layernames
+    ]
+    fnames_out = []
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_WORKERS, len(layernames) or 1)
+    ) as executor:
+        futures = [
+            executor.submit(
+                get_radiometric_image,
+                outfname=outfname,
+                layername=layername,
+                bbox=bbox,
+                url=url,
+                resolution=resolution,
+                crs=crs,
+                date=dates[layername],
+                size=size,
+            )
+            for layername, outfname in zip(layernames, outfnames)
+        ]
+        for outfname, future in zip(outfnames, futures):
+            if future.result():
+                fnames_out.append(outfname)
     return fnames_out
 
 
 @retry_decorator()
-def get_radiometric_image(outfname, layername, bbox, url, resolution, crs):
+def get_radiometric_image(
+    outfname, layername, bbox, url, resolution, crs, date=None, size=None
+):
     """
     Download radiometric data layer and save geotiff from WCS layer.
 
@@ -107,47 +176,67 @@ def get_radiometric_image(outfname, layername, bbox, url, resolution, crs):
     resolution : int
     url : str
     crs: str
+    date : str, optional
+        layer time position; looked up from the capabilities if None
+    size : tuple of int, optional
+        output (width, height) in pixels; derived from bbox and resolution if None
 
     Return
     ------
     Exited ok: boolean
     """
-    # If the resolution passed is None, set to native resolution of datasource
-    if resolution is None:
-        resolution = get_radiometricdict()["resolution_arcsec"]
-
-    # Convert resolution into width and height pixel number
-    width = abs(bbox[2] - bbox[0])
-    height = abs(bbox[3] - bbox[1])
-    nwidth = int(width / resolution * 3600)
-    nheight = int(height / resolution * 3600)
+    if size is not None:
+        nwidth, nheight = size
+    else:
+        # If the resolution passed is None, set to native resolution of datasource
+        if resolution is None:
+            resolution = get_radiometricdict()["resolution_arcsec"]
+        nwidth, nheight = _pixel_size(bbox, resolution)
 
-    # Get date
-    times = get_times(url, layername)
-    # There is only one time available per layer
-    date = times[0]
     # Get data
     if os.path.exists(outfname):
         logger.info(f"{layername}.tiff already exists, skipping download")
     else:
+        if date is None:
+            # There is only one time available per layer
+            date = get_times(url, layername)[0]
+        # The capabilities (cached) tell us where to send GetCoverage; the coverage itself is
+        # requested directly so the GeoTIFF streams to disk instead of being read into memory
+        # whole as owslib does.
+        params = {
+            "service": "WCS",
+            "version": "1.0.0",
+            "request": "GetCoverage",
+            "coverage": layername,
+            "bbox": ",".join(str(b) for b in bbox),
+            "crs": crs,
+            "format": "GeoTIFF",
+            "time": date,
+            "width": nwidth,
+            "height": nheight,
+        }
+        partfname = f"{outfname}.part"
         try:
-            wcs = WebCoverageService(url, version="1.0.0", timeout=300)
-            data = wcs.getCoverage(
-                identifier=layername,
-                time=[date],
-                bbox=bbox,
-                format="GeoTIFF",
-                crs=crs,
-                width=nwidth,
-                height=nheight,
-            )
+            with _SESSION.get(
+                _getcoverage_url(url), params=params, timeout=300, stream=True
+            ) as response:
+                response.raise_for_status()
+                # the server reports errors as an XML ServiceExceptionReport
+                if "xml" in response.headers.get("Content-Type", ""):
+                    logger.error(f"Error fetching RadMap wcs: {response.text}")
+                    return False
+
+                # Save data in 1 MB chunks, renaming into place once complete
+                with open(partfname, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
+                os.replace(partfname, outfname)
         except Exception as e:
+            if os.path.exists(partfname):
+                os.remove(partfname)
             logger.error(f"Error fetching RadMap wcs: {e}")
             return False
 
-        # Save data
-        with open(outfname, "wb") as f:
-            f.write(data.read())
         logger.info(f"Layer {layername} saved in {outfname}")
 
     return True
@@ -168,8 +257,9 @@ def get_times(url, layername, year=None):
     list of dates
     """
 
-    wcs = WebCoverageService(url, version="1.0.0", timeout=300)
-    times = wcs[layername].timepositions
+    times = utils._get_wcs(
+        url, timeout=CAPABILITIES_TIMEOUT, ttl_hash=utils._ttl_hash()
+    )[layername].timepositions
     if year is None:
         return times
     else:
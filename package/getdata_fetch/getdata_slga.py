@@ -1,44 +1,129 @@
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from importlib import resources
+from types import MappingProxyType
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from geodata_fetch.utils import retry_decorator, wcs_base_url
+
+logger = logging.getLogger(__name__)
+
+# SLGA requests are network-bound, so a small thread pool overlaps the round-trips
+# without hammering the server.
+MAX_WORKERS = 8
+
+# One pooled session for the whole module so every depth/layer request to the SLGA
+# host reuses an open keep-alive connection instead of paying a new TLS handshake.
+# The adapter also retries transient statuses with exponential backoff, waiting for the
+# server's Retry-After on 429/503; @retry_decorator is left to cover dropped connections.
+RETRY_STATUSES = (429, 502, 503, 504)
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    ),
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+
+# SLGA depth interval boundaries [cm]; interval i spans _DEPTH_LOW[i] to _DEPTH_HIGH[i]
+_INTERVALS = np.array([0, 5, 15, 30, 60, 100, 200])
+_DEPTH_LOW = _INTERVALS[:-1]
+_DEPTH_HIGH = _INTERVALS[1:]
+_INTERVAL_IDX = np.arange(len(_DEPTH_LOW))
+# depth option string -> (lower, upper) bounds of that interval [cm]
+_DEPTH_MAP = {
+    f"{lower}-{upper}cm": (int(lower), int(upper))
+    for lower, upper in zip(_DEPTH_LOW, _DEPTH_HIGH)
+}
+
+
+_CONFIG_KEYS = (
+    "title",
+    "description",
+    "license",
+    "source_url",
+    "copyright",
+    "attribution",
+    "crs",
+    "bbox",
+    "resolution_arcsec",
+    "depth_min",
+    "depth_max",
+    "layers_url",
+)
 
-from owslib.wcs import WebCoverageService
 
-from geodata_fetch.utils import retry_decorator
+@lru_cache(maxsize=1)
+def _load_slga_config():
+    """
+    Parse the packaged SLGA config once per process.
+    The result is read-only since it is shared by every slga_harvest instance.
+    """
+    with resources.open_text("data", "slga_soil_default_config.json") as f:
+        config_json = json.load(f)
+    return MappingProxyType({key: config_json.get(key) for key in _CONFIG_KEYS})
+
 
-logger = logging.getLogger()
-# try this but remove if it doesn't work well with datadog:
-logging.basicConfig(
-    level=logging.ERROR, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+def _is_downloaded(outfname):
+    """
+    True if outfname was fully written by a previous getwcs_slga call. Downloads are
+    streamed to <outfname>.part and only renamed on completion, so an interrupted
+    download never leaves a file under the final name.
+    """
+    return os.path.exists(outfname) and os.path.getsize(outfname) > 0
+
+
+def _write_atomic(outfname, chunks):
+    # write to a .part file and rename it into place once it is complete, so an
+    # interrupted download never leaves a truncated file that looks finished
+    partfname = f"{outfname}.part"
+    try:
+        with open(partfname, "wb", buffering=0) as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(partfname, outfname)
+    except BaseException:
+        if os.path.exists(partfname):
+            os.remove(partfname)
+        raise
 
 
 class slga_harvest:
+    # set to True to fetch coverages through owslib instead of the direct GetCoverage request
+    use_owslib = False
+
     def __init__(self):
         self.load_configuration()
 
     def load_configuration(self):
         try:
-            with resources.open_text("data", "slga_soil_default_config.json") as f:
-                config_json = json.load(f)
-            self.initialise_attributes_from_json(config_json)
+            self.initialise_attributes_from_json(_load_slga_config())
         except Exception as e:
-            logger.error(f"Error loading slga_soil.json to dem_harvest module: {e}")
+            logger.error(
+                f"Error loading slga_soil_default_config.json to slga_harvest module: {e}",
+                exc_info=True,
+            )
 
     def initialise_attributes_from_json(self, slga_json):
-        self.title = slga_json.get("title")
-        self.description = slga_json.get("description")
-        self.license = slga_json.get("license")
-        self.source_url = slga_json.get("source_url")
-        self.copyright = slga_json.get("copyright")
-        self.attribution = slga_json.get("attribution")
-        self.crs = slga_json.get("crs")
-        self.bbox = slga_json.get("bbox")
-        self.resolution_arcsec = slga_json.get("resolution_arcsec")
-        self.depth_min = slga_json.get("depth_min")
-        self.depth_max = slga_json.get("depth_max")
-        self.layers_url = slga_json.get("layers_url")
+        for key in _CONFIG_KEYS:
+            setattr(self, key, slga_json.get(key))
+        # copy the nested url mapping so instances can't mutate the cached config
+        self.layers_url = dict(self.layers_url or {})
         self.fetched_files = []
 
     @retry_decorator()
@@ -63,40 +148,101 @@ class slga_harvest:
 
         """
         resolution = resolution if resolution is not None else self.resolution_arcsec
+        if self.use_owslib:
+            return self._getwcs_owslib(url, identifier, crs, bbox, resolution, outfname)
+        # WCS 1.0.0 GetCoverage is a plain KVP request, so issue it through the pooled
+        # session rather than building an owslib WebCoverageService (and fetching the
+        # capabilities document) for every identifier.
+        # Here, identifier refers to the soil depth e.g. 0-5cm, 5-15cm depth.
+        params = {
+            "SERVICE": "WCS",
+            "VERSION": "1.0.0",
+            "REQUEST": "GetCoverage",
+            "COVERAGE": identifier,
+            "CRS": crs,
+            "BBOX": ",".join(str(b) for b in bbox),
+            "FORMAT": "GEOTIFF",
+            "RESX": resolution,
+            "RESY": resolution,
+        }
         try:
-            # for the given endpoint e.g. Organic_Carbon, connect to the web coverage service
-            wcs = WebCoverageService(
-                url, version="1.0.0", timeout=600
-            )  # upping the timeout to see if this reduces SLGA failures
-
-            # Use the WCS to download the data as geotiffs. Here, identifier refers to the soil depth e.g. 0-5cm, 5-15cm depth.
-            data = wcs.getCoverage(
-                identifier,
-                format="GEOTIFF",
-                bbox=bbox,
-                crs=crs,
-                resx=resolution,
-                resy=resolution,
-            )
+            # upping the timeout to see if this reduces SLGA failures
+            with _SESSION.get(
+                wcs_base_url(url), params=params, timeout=600, stream=True
+            ) as response:
+                response.raise_for_status()
+                # the server reports errors as an XML ServiceExceptionReport
+                if "xml" in response.headers.get("Content-Type", ""):
+                    logger.error(
+                        "WCS service exception for coverage %s at %s: %s",
+                        identifier,
+                        url,
+                        response.text,
+                    )
+                    return False
 
-            # Save data
-            with open(outfname, "wb") as f:
-                f.write(data.read())
-                print(f"WCS data downloaded and saved as {os.path.basename(outfname)}")
+                # Save data, streaming 1 MB chunks straight to disk rather than holding
+                # the whole GeoTIFF in memory. iter_content also undoes any content-encoding.
+                _write_atomic(outfname, response.iter_content(chunk_size=1 << 20))
+                logger.info(
+                    "WCS data downloaded and saved as %s", os.path.basename(outfname)
+                )
+            return True
 
-        except Exception as e:
-            if e.response.status_code == 502:
+        except requests.HTTPError as e:
+            # only reached once the adapter's retries are used up
+            status = e.response.status_code
+            if status == 502:
                 logger.error(
-                    f"HTTPError 502: Bad Gateway encountered when accessing {url}"
+                    "HTTPError 502: Bad Gateway encountered when accessing %s", url
                 )
-            elif e.response.status_code == 503:
+            elif status == 503:
                 logger.error(
-                    f"HTTPError 503: Service Unavailable encountered when accessing {url}"
+                    "HTTPError 503: Service Unavailable encountered when accessing %s",
+                    url,
                 )
             else:
                 logger.error(
-                    f"Error {e.response.status_code}: {e.response.reason} when accessing {url}"
+                    "Error %s: %s when accessing %s", status, e.response.reason, url
                 )
+            return False
+
+    def _getwcs_owslib(self, url, identifier, crs, bbox, resolution, outfname):
+        """
+        Fallback for getwcs_slga that goes through owslib's full WCS handshake (capabilities
+        and coverage description) for servers that reject a bare GetCoverage request.
+        """
+        from owslib.util import ServiceException
+        from owslib.wcs import WebCoverageService
+
+        try:
+            wcs = WebCoverageService(url, version="1.0.0", timeout=600)
+            data = wcs.getCoverage(
+                identifier,
+                format="GEOTIFF",
+                bbox=bbox,
+                crs=crs,
+                resx=resolution,
+                resy=resolution,
+            )
+            _write_atomic(outfname, iter(lambda: data.read(1 << 20), b""))
+            logger.info(
+                "WCS data downloaded and saved as %s", os.path.basename(outfname)
+            )
+            return True
+        except requests.HTTPError as e:
+            logger.error(
+                "Error %s: %s when accessing %s",
+                e.response.status_code,
+                e.response.reason,
+                url,
+            )
+            return False
+        except ServiceException as e:
+            logger.error(
+                "WCS service exception for coverage %s at %s: %s", identifier, url, e
+            )
+            return False
 
     def get_slga_layers(
         self,
@@ -108,6 +254,7 @@ class slga_harvest:
         depth_min=0,
         depth_max=200,
         get_ci=False,
+        max_workers=MAX_WORKERS,
     ):
         """
         Download layers from SLGA and saves as geotif.
@@ -120,6 +267,8 @@ class slga_harvest:
         depth_min : minimum depth (Default: 0 cm). If depth_min and depth_max are lists, then must have same length as layernames
         depth_max : maximum depth (Default: 200 cm, maximum depth of SLGA data)
         outpath : output path
+        max_workers : number of concurrent downloads (Default: MAX_WORKERS). Kept low to avoid
+            SLGA server throttling.
 
         Returns
         -------
@@ -150,71 +299,91 @@ class slga_harvest:
             resolution_deg = resolution / 3600.0
 
             fnames_out = []
-            for idx, layername in enumerate(layernames):
+            jobs = []
+            seen = set()
+            # Get depth identifiers for layers, dropping layers whose depth range doesn't
+            # cover any SLGA interval before any urls or requests are built for them
+            plans = []
+            for layername, dmin, dmax in zip(layernames, depth_min, depth_max):
+                depth_ids = depth2identifier(dmin, dmax)
+                if not depth_ids[0]:
+                    logger.warning(
+                        "No SLGA depth intervals within %s-%scm for %s, skipping",
+                        dmin,
+                        dmax,
+                        layername,
+                    )
+                    continue
+                plans.append((layername, depth_ids))
+
+            for layername, depth_ids in plans:
                 layer_url = self.layers_url[layername]
-                # Get depth identifiers for layers
                 (
                     identifiers,
                     identifiers_ci_5pc,
                     identifiers_ci_95pc,
                     depth_lower,
                     depth_upper,
-                ) = depth2identifier(depth_min[idx], depth_max[idx])
+                ) = depth_ids
 
-                # if confidence intervals not requested, do this:
                 for i in range(len(identifiers)):
-                    identifier = identifiers[i]
                     layer_depth_name = (
                         f"SLGA_{layername}_{depth_lower[i]}-{depth_upper[i]}cm"
                     )
-
-                    fname_out = os.path.join(
-                        outpath, f"{layer_depth_name}_{property_name}.tiff"
-                    )
-                    # download data
-                    dl = self.getwcs_slga(
-                        layer_url, identifier, self.crs, bbox, resolution_deg, fname_out
+                    fname_base = os.path.join(
+                        outpath, f"{layer_depth_name}_{property_name}"
                     )
-                    if dl:
-                        fnames_out.append(fname_out)
-                # if confidence intervals requested, do this instead:
-                if get_ci:
-                    for i in range(len(identifiers)):
-                        # set identifiers for the 5 and 95% CI's
-                        identifier_5 = identifiers_ci_5pc[i]
-                        identifier_95 = identifiers_ci_95pc[i]
-
-                        layer_depth_name = (
-                            f"SLGA_{layername}_{depth_lower[i]}-{depth_upper[i]}cm"
-                        )
-                        fname_out_5 = os.path.join(
-                            outpath,
-                            f"{layer_depth_name}_{property_name}_5percentile.tiff",
-                        )
-
-                        fname_out_95 = os.path.join(
-                            outpath,
-                            f"{layer_depth_name}_{property_name}_95percentile.tiff",
+                    layer_jobs = [(identifiers[i], f"{fname_base}.tiff")]
+                    # if confidence intervals requested, the 5 and 95% CI's are fetched too
+                    if get_ci:
+                        layer_jobs.append(
+                            (identifiers_ci_5pc[i], f"{fname_base}_5percentile.tiff")
                         )
-                        # download data
-                        dl_5 = self.getwcs_slga(
-                            layer_url,
-                            identifier_5,
-                            self.crs,
-                            bbox,
-                            resolution_deg,
-                            fname_out,
+                        layer_jobs.append(
+                            (identifiers_ci_95pc[i], f"{fname_base}_95percentile.tiff")
                         )
-                        dl_95 = self.getwcs_slga(
+                    for identifier, fname_out in layer_jobs:
+                        # don't request the same coverage twice within one harvest
+                        key = (layer_url, identifier, tuple(bbox), resolution_deg)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        jobs.append((layer_url, identifier, fname_out))
+
+            # download all depth layers concurrently, keeping the output order of the job list.
+            # Files completed by an earlier run are kept rather than downloaded again.
+            # WCS 1.0.0 GetCoverage only takes a single COVERAGE, so each depth (and CI band)
+            # stays its own request; the pooled _SESSION keeps them on reused connections.
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    (
+                        None
+                        if _is_downloaded(fname_out)
+                        else executor.submit(
+                            self.getwcs_slga,
                             layer_url,
-                            identifier_95,
+                            identifier,
                             self.crs,
                             bbox,
                             resolution_deg,
                             fname_out,
                         )
-                        if dl_5 and dl_95:
-                            fnames_out.append(fname_out_5, fname_out_95)
+                    )
+                    for layer_url, identifier, fname_out in jobs
+                ]
+                for (_, _, fname_out), future in zip(jobs, futures):
+                    if future is None:
+                        logger.info("%s already downloaded, skipping", fname_out)
+                        fnames_out.append(fname_out)
+                        continue
+                    # one layer failing (e.g. retries exhausted) mustn't lose the others
+                    try:
+                        downloaded = future.result()
+                    except Exception as e:
+                        logger.error("Failed to download %s: %s", fname_out, e)
+                        continue
+                    if downloaded:
+                        fnames_out.append(fname_out)
 
             return fnames_out
         except Exception as e:
@@ -242,28 +411,15 @@ def depth2identifier(depth_min, depth_max):
     """
 
     try:
-        depth_intervals = [0, 5, 15, 30, 60, 100, 200]
-        identifiers = []
-        identifiers_ci_5pc = []
-        identifiers_ci_95pc = []
-        depths_lower = []
-        depths_upper = []
-        # Loop over depth intervals
-        for i in range(len(depth_intervals) - 1):
-            if (depth_min <= depth_intervals[i]) & (
-                depth_max >= depth_intervals[i + 1]
-            ):
-                identifiers.append(str(3 * i + 1))
-                identifiers_ci_5pc.append(str(3 * i + 3))
-                identifiers_ci_95pc.append(str(3 * i + 2))
-                depths_lower.append(depth_intervals[i])
-                depths_upper.append(depth_intervals[i + 1])
+        # select all depth intervals inside the requested range in one vectorised pass
+        mask = (depth_min <= _DEPTH_LOW) & (depth_max >= _DEPTH_HIGH)
+        idx = _INTERVAL_IDX[mask]
         return (
-            identifiers,
-            identifiers_ci_5pc,
-            identifiers_ci_95pc,
-            depths_lower,
-            depths_upper,
+            (3 * idx + 1).astype(str).tolist(),
+            (3 * idx + 3).astype(str).tolist(),
+            (3 * idx + 2).astype(str).tolist(),
+            _DEPTH_LOW[mask].tolist(),
+            _DEPTH_HIGH[mask].tolist(),
         )
     except Exception as e:
         logger.error(f"Failed to get identifiers: {e}")
@@ -283,31 +439,16 @@ def identifier2depthbounds(depths):
     min depth
     max depth
     """
-    depth_options = [
-        "0-5cm",
-        "5-15cm",
-        "15-30cm",
-        "30-60cm",
-        "60-100cm",
-        "100-200cm",
-    ]
-    depth_intervals = [0, 5, 15, 30, 60, 100, 200]
     try:
         # Check first if entries valid
-        for depth in depths:
-            assert (
-                depth in depth_options
-            ), f"depth should be one of the following options {depth_options}"
+        try:
+            bounds = [_DEPTH_MAP[depth] for depth in depths]
+        except KeyError:
+            raise AssertionError(
+                f"depth should be one of the following options {list(_DEPTH_MAP)}"
+            )
         # find min and max depth
-        ncount = 0
-        for i in range(len(depth_options)):
-            if depth_options[i] in depths:
-                depth_max = depth_intervals[i + 1]
-                if ncount == 0:
-                    depth_min = depth_intervals[i]
-                ncount += 1
-        assert ncount == len(depths), f"ncount = {ncount}"
-        return depth_min, depth_max
+        return min(lower for lower, _ in bounds), max(upper for _, upper in bounds)
     except Exception as e:
         logger.error(f"Failed to get min and max depth: {e}")
         return None, None
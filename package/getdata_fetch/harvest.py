@@ -26,6 +26,8 @@ To use this script, create an instance of the `DataHarvester` class and call the
 
 import logging
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # from geodata_fetch import getdata_radiometric  # getdata_dem
 from geodata_fetch.getdata_dem import (  # updated call to dem using class
@@ -33,13 +35,24 @@ from geodata_fetch.getdata_dem import (  # updated call to dem using class
     dem_harvest_global,
 )
 from geodata_fetch.getdata_slga import identifier2depthbounds, slga_harvest
-from geodata_fetch.utils import load_settings, reproj_mask
+from geodata_fetch.utils import load_settings, reproj_mask_batch
+
+logger = logging.getLogger(__name__)
+
+# outputs of earlier masking/colouring steps, which mask_data must not pick up again
+_DERIVED_TIFF = re.compile(r"_(masked|colored|cog|cog\.public)\.tiff$")
 
-logger = logging.getLogger()
-# try this but remove if it doesn't work well with datadog:
-logging.basicConfig(
-    level=logging.ERROR, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+
+def _iter_tifs(path):
+    """Yield the names of the fetched (not yet derived) .tiff files in path."""
+    with os.scandir(path) as entries:
+        for e in entries:
+            if (
+                e.is_file()
+                and e.name.endswith(".tiff")
+                and not _DERIVED_TIFF.search(e.name)
+            ):
+                yield e.name
 
 
 class Settings:
@@ -63,22 +76,6 @@ class data_source_interface:
         raise NotImplementedError
 
 
-class data_source_factory:
-    @staticmethod
-    def get_data_source(source_type):
-        if source_type == "DEM":
-            print("source type is DEM")
-            return DEM_data_source()
-        elif source_type == "DEM Global":
-            print("source type is DEM Global")
-            return glob_DEM_data_source()
-        elif source_type == "SLGA":
-            print("source type is SLGA")
-            return SLGA_data_source()
-        else:
-            raise ValueError(f"Unknown data source: {source_type}")
-
-
 class DEM_data_source(data_source_interface):
     def __init__(self):
         self.dem_harvester = dem_harvest()
@@ -94,7 +91,7 @@ class DEM_data_source(data_source_interface):
             )
             return dem_data
         except Exception as e:
-            print(f"Error fetching DEM data: {e}")
+            logger.error("Error fetching DEM data: %s", e)
             return []
 
 
@@ -112,7 +109,7 @@ class glob_DEM_data_source(data_source_interface):
             )
             return glob_dem_data
         except Exception as e:
-            print(f"Error fetching DEM Global data: {e}")
+            logger.error("Error fetching DEM Global data: %s", e)
             return []
 
 
@@ -122,17 +119,14 @@ class SLGA_data_source(data_source_interface):
 
     def fetch_data(self, settings):
         try:
-            depth_min = []
-            depth_max = []
-            for layername in settings.target_sources["SLGA"].keys():
-                depth_bounds = settings.target_sources["SLGA"][layername]
-                dmin, dmax = identifier2depthbounds(depth_bounds)
-                depth_min.append(dmin)
-                depth_max.append(dmax)
+            slga_layers = settings.target_sources["SLGA"]
+            # one pass over the layers, split into the min and max depth lists
+            pairs = [identifier2depthbounds(db) for db in slga_layers.values()]
+            depth_min, depth_max = map(list, zip(*pairs)) if pairs else ([], [])
 
             files_slga = self.slga_harvester.get_slga_layers(
                 property_name=settings.property_name,
-                layernames=list(settings.target_sources["SLGA"].keys()),
+                layernames=list(slga_layers),
                 bbox=settings.target_bbox,
                 outpath=settings.outpath,
                 depth_min=depth_min,
@@ -141,10 +135,26 @@ class SLGA_data_source(data_source_interface):
             )
             return files_slga
         except Exception as e:
-            print(f"Error fetching SLGA data: {e}")
+            logger.error("Error fetching SLGA data: %s", e)
             return []
 
 
+class data_source_factory:
+    _REGISTRY = {
+        "DEM": DEM_data_source,
+        "DEM Global": glob_DEM_data_source,
+        "SLGA": SLGA_data_source,
+    }
+
+    @classmethod
+    def get_data_source(cls, source_type):
+        try:
+            source_class = cls._REGISTRY[source_type]
+        except KeyError:
+            raise ValueError(f"Unknown data source: {source_type}") from None
+        return source_class()
+
+
 class DataHarvester:
     def __init__(self, path_to_config, input_geom):
         config = load_settings(path_to_config)
@@ -160,39 +170,41 @@ class DataHarvester:
         if self.settings.add_buffer:
             self.input_geom = self.input_geom.buffer(0.002, join_style=2, resolution=15)
 
-        for source_name, source in self.data_sources.items():
-            try:
-                print(f"processing {source_name}:")
-                source.fetch_data(self.settings)
-            except Exception as e:
-                print(f"error fetching {source_name}: {e}")
+        # the sources are independent and network bound, so fetch them all at once
+        with ThreadPoolExecutor(max_workers=max(1, len(self.data_sources))) as executor:
+            futures = {}
+            for source_name, source in self.data_sources.items():
+                logger.info("processing %s:", source_name)
+                futures[executor.submit(source.fetch_data, self.settings)] = source_name
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error("error fetching %s: %s", futures[future], e)
 
         if self.settings.data_mask:
             self.mask_data()
 
     def mask_data(self):
+        # the directory scan is lazy, so workers start masking the first files while the rest
+        # of a large output directory is still being listed
+        logger.info("Masking files in %s", self.settings.outpath)
         try:
-            tif_files = [
-                f
-                for f in os.listdir(self.settings.outpath)
-                if f.endswith(".tiff")
-                and not f.endswith(
-                    ("_masked.tiff", "_colored.tiff", "_cog.tiff", "_cog.public.tiff")
-                )
-            ]
+            masked_files = reproj_mask_batch(
+                filenames=_iter_tifs(self.settings.outpath),
+                input_filepath=self.settings.outpath,
+                bbox=self.input_geom,
+                out_crscode=self.settings.target_crs,
+                output_filepath=self.settings.outpath,
+                resample=self.settings.resample,
+            )
         except Exception as e:
-            logger.error(f"Error listing tiff files: {e}")
-
-        for tif in tif_files:
-            try:
-                print(f"Masking {tif}")
-                reproj_mask(
-                    filename=tif,
-                    input_filepath=self.settings.outpath,
-                    bbox=self.input_geom,
-                    out_crscode=self.settings.target_crs,
-                    output_filepath=self.settings.outpath,
-                    resample=self.settings.resample,
-                )
-            except Exception as e:
-                logger.error(f"Error masking {tif}: {e}")
+            logger.error(f"Error masking files: {e}")
+            return
+
+        for tif, masked in masked_files:
+            if masked is None:
+                logger.error("Error masking %s", tif)
+            else:
+                logger.debug("Masked %s", tif)
+        logger.info("Masked %d files", len(masked_files))
@@ -8,11 +8,7 @@ import json
 import logging
 from types import SimpleNamespace
 
-logger = logging.getLogger()
-# try this but remove if it doesn't work well with datadog:
-logging.basicConfig(
-    level=logging.ERROR, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+logger = logging.getLogger(__name__)
 
 def DateEncoder(obj):
     """
@@ -64,12 +60,13 @@ def main(fname_settings, to_namespace=True):
         with open(fname_settings, "r") as f:
             settings = json.load(f)
 
+        # derived fields are set on the dict, so they exist whether or not it becomes a namespace
+        settings["date_min"] = str(settings["date_start"])
+        settings["date_max"] = str(settings["date_end"])
+
         if to_namespace:
             settings = SimpleNamespace(**settings)
 
-        settings.date_min = str(settings.date_start)
-        settings.date_max = str(settings.date_end)
-
         return settings
     except FileNotFoundError as e:
         logger.error(f"File not found: {fname_settings}")
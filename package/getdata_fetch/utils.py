@@ -9,52 +9,97 @@ arc2meter: Converter arc seconds to meter and vice versa.
 
 meter2arc: Converter arc seconds to meter and vice versa.
 
-get_wcs_capabilities: Get capabilities from WCS layer. Can return some metadata about the dataset as well as individual layers contained in the wcs server.
+_ttl_hash (internal): Time bucket used to expire cached capabilities.
+
+_get_wcs (internal): Returns a cached WebCoverageService for a url.
+
+_load_capabilities_cache (internal): Reads a cached capabilities file, removing it if it is unreadable.
+
+_save_capabilities_cache (internal): Writes a capabilities cache file atomically.
+
+get_wcs_capabilities: Get capabilities from WCS layer. Can return some metadata about the dataset as well as individual layers contained in the wcs server. Results are cached on disk per url for CAPABILITIES_TTL seconds.
+
+wcs_base_url: Strips OWS request parameters from a WCS url so it can take a GetCoverage request.
 
 _getFeatures (internal): Extracts rasterio compatible test from geodataframe.
 
 _read_file: Reads a raster file using rasterio library.
 
-reproj_mask: Masks a raster to the area of a shape, and reprojects.
+_to_dataarray (internal): Wraps a warped numpy array as a georeferenced DataArray.
+
+_transformer (internal): Returns a cached pyproj Transformer for a CRS pair.
+
+_default_grid (internal): Returns the cached output grid of a raster reprojected to another CRS.
+
+reproj_mask: Masks a raster to the area of a shape, reprojects, and saves it as a COG.
+
+reproj_mask_batch: Runs reproj_mask over a list of files in a process pool.
 
 colour_geotiff_and_save_cog: Colorizes a GeoTIFF image using a specified color map and saves it as a COG (Cloud-Optimized GeoTIFF).
 
-retry_decorator: A decorator to retry the WCS endpoint if an HTTP 502 or 503 error occurs.
+retry_decorator: A decorator to retry the WCS endpoint on HTTP 502, 503 or 504, connection errors and socket timeouts, with jittered exponential backoff.
 
 """
 
 # TODO: add function that can take a list or dictionary of variables and create the json-like object needed by load_settings. This removes it from the notebooks and user's responsibility.
 
+import hashlib
 import json
 import logging
+import math
 import os
+import pickle
+import random
+import socket
+import tempfile
 import time
-from functools import wraps
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial, wraps
 from types import SimpleNamespace
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import numpy as np
 import rasterio
+import requests
 import rioxarray as rxr
+import xarray as xr
 from matplotlib import cm
-from matplotlib.colors import Normalize
 from owslib.wcs import WebCoverageService
+from pyproj import Transformer
 from rasterio.enums import Resampling
+from rasterio.features import geometry_mask
 from rasterio.io import MemoryFile
-from rasterio.plot import reshape_as_raster
+from rasterio.vrt import WarpedVRT
 from rasterio.warp import Resampling, calculate_default_transform
+from rasterio.windows import Window, from_bounds
+from rasterio.windows import transform as window_transform
 from rio_cogeo.cogeo import cog_translate
 from rio_cogeo.profiles import cog_profiles
+from shapely.geometry import mapping
+from shapely.ops import transform as shapely_transform
+
+logger = logging.getLogger(__name__)
 
-logger = logging.getLogger()
-# try this but remove if it doesn't work well with datadog:
-logging.basicConfig(
-    level=logging.ERROR, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# on-disk cache for parsed WCS capabilities, so new processes can skip the XML fetch and parse
+CAPABILITIES_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "geodata_fetch"
 )
+# capabilities rarely change, but are refetched after this many seconds so a server-side
+# update (new layers, changed extents) is picked up without clearing the cache by hand
+CAPABILITIES_TTL = 3600
 
 
 def list_tif_files(path):
     try:
-        return [f for f in os.listdir(path) if f.endswith(".tiff")]
+        # scandir yields the entry type with the name, so no extra stat per file; the
+        # extension match is case-insensitive so .TIF files are picked up too
+        with os.scandir(path) as entries:
+            return [
+                e.name
+                for e in entries
+                if e.is_file(follow_symlinks=False)
+                and e.name.lower().endswith((".tif", ".tiff"))
+            ]
     except Exception as e:
         logger.error(
             f"Error listing TIFF files in directory {path}: {e}", exc_info=True
@@ -83,11 +128,9 @@ def load_settings(input_settings):
         else:
             settings = json.load(input_settings)
 
-        settings = SimpleNamespace(**settings)
-
-        settings.date_min = str(settings.date_start)
-        settings.date_max = str(settings.date_end)
-        return settings
+        settings["date_min"] = str(settings["date_start"])
+        settings["date_max"] = str(settings["date_end"])
+        return SimpleNamespace(**settings)
     except json.JSONDecodeError as e:
         logger.error(
             f"JSON decode error in load_settings with input {input_settings}: {e}",
@@ -101,21 +144,37 @@ def load_settings(input_settings):
         logger.error(f"Error loading the data harvester settings: {e}", exc_info=True)
 
 
+# conversion constants for calc_arc2meter / calc_meter2arc, so the hot path only multiplies
+_DEG2RAD = math.pi / 180.0
+_INV_30922 = 1.0 / 30.922
+_INV_3087 = 1.0 / 30.87
+
+
+def _cos_lat(latitude):
+    """
+    Cosine of a latitude in degrees. Plain numbers take the math.cos path, which skips
+    the numpy ufunc dispatch; arrays are broadcast in a single np.cos call.
+    """
+    if isinstance(latitude, (int, float)):
+        return math.cos(latitude * _DEG2RAD)
+    return np.cos(np.asarray(latitude) * _DEG2RAD)
+
+
 def calc_arc2meter(arcsec, latitude):
     """
     Calculate arc seconds to meter
 
     Input
     -----
-    arcsec: float, arcsec
-    latitude: float, latitude
+    arcsec: float or array, arcsec
+    latitude: float or array, latitude
 
     Return
     ------
     (meters Long, meters Lat)
     """
     try:
-        meter_lng = arcsec * np.cos(latitude * np.pi / 180) * 30.922
+        meter_lng = arcsec * _cos_lat(latitude) * 30.922
         meter_lat = arcsec * 30.87
         return (meter_lng, meter_lat)
     except Exception as e:
@@ -132,16 +191,16 @@ def calc_meter2arc(meter, latitude):
 
     Input
     -----
-    meter: float, meter
-    latitude: float, latitude
+    meter: float or array, meter
+    latitude: float or array, latitude
 
     Return
     ------
     (arcsec Long, arcsec Lat)
     """
     try:
-        arcsec_lng = meter / np.cos(latitude * np.pi / 180) / 30.922
-        arcsec_lat = meter / 30.87
+        arcsec_lng = meter * _INV_30922 / _cos_lat(latitude)
+        arcsec_lat = meter * _INV_3087
         return (arcsec_lng, arcsec_lat)
     except Exception as e:
         logger.error(
@@ -151,6 +210,56 @@ def calc_meter2arc(meter, latitude):
         return None, None
 
 
+def _ttl_hash():
+    """
+    Changes once every CAPABILITIES_TTL seconds; passed to lru_cache'd helpers so their
+    entries expire.
+    """
+    return int(time.time() // CAPABILITIES_TTL)
+
+
+@lru_cache(maxsize=32)
+def _get_wcs(url, timeout=600, ttl_hash=None):
+    """
+    Return a WebCoverageService for the url, reusing it until the ttl_hash changes.
+    Building one fetches and parses the GetCapabilities document, which can be megabytes.
+    """
+    return WebCoverageService(url, version="1.0.0", timeout=timeout)
+
+
+def _load_capabilities_cache(cache_file):
+    """
+    Return the (keys, titles, descriptions, bboxs) pickled in cache_file, or None if it can't
+    be read. An unreadable file is removed so the capabilities are fetched live again.
+    """
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        logger.warning(f"Discarding unreadable capabilities cache {cache_file}: {e}")
+        try:
+            os.remove(cache_file)
+        except OSError:
+            pass
+        return None
+
+
+def _save_capabilities_cache(cache_file, capabilities):
+    """
+    Pickle capabilities to cache_file through a temporary file in the same directory, which
+    is moved into place once complete, so a reader never sees a partly written cache.
+    """
+    os.makedirs(CAPABILITIES_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CAPABILITIES_CACHE_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(capabilities, f)
+        os.replace(tmp_path, cache_file)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
 def get_wcs_capabilities(url):
     """
     Get capabilities from WCS layer
@@ -176,24 +285,43 @@ def get_wcs_capabilities(url):
         A list of layer bounding boxes.
     """
     try:
-        # Create WCS object
-        wcs = WebCoverageService(url, version="1.0.0", timeout=600)
-        content = wcs.contents
-        keys = content.keys()
+        cache_file = os.path.join(
+            CAPABILITIES_CACHE_DIR, f"{hashlib.sha1(url.encode()).hexdigest()}.pkl"
+        )
+        cached = None
+        if (
+            os.path.exists(cache_file)
+            and time.time() - os.path.getmtime(cache_file) < CAPABILITIES_TTL
+        ):
+            cached = _load_capabilities_cache(cache_file)
+        if cached is not None:
+            keys, title_list, description_list, bbox_list = cached
+        else:
+            # Create WCS object
+            wcs = _get_wcs(url, ttl_hash=_ttl_hash())
+            keys = list(wcs.contents.keys())
+
+            # Get bounding boxes and crs for each coverage
+            bbox_list = []
+            title_list = []
+            description_list = []
+            for key in keys:
+                title_list.append(wcs[key].title)
+                description_list.append(wcs[key].abstract)
+                bbox_list.append(wcs[key].boundingboxes)
+
+            _save_capabilities_cache(
+                cache_file, (keys, title_list, description_list, bbox_list)
+            )
 
-        # Get bounding boxes and crs for each coverage
         print("Following data layers are available:")
-        bbox_list = []
-        title_list = []
-        description_list = []
-        for key in keys:
+        for key, title, description, bboxs in zip(
+            keys, title_list, description_list, bbox_list
+        ):
             print(f"key: {key}")
-            print(f"title: {wcs[key].title}")
-            title_list.append(wcs[key].title)
-            print(f"{wcs[key].abstract}")
-            description_list.append(wcs[key].abstract)
-            print(f"bounding box: {wcs[key].boundingboxes}")
-            bbox_list.append(wcs[key].boundingboxes)
+            print(f"title: {title}")
+            print(f"{description}")
+            print(f"bounding box: {bboxs}")
 
         return keys, title_list, description_list, bbox_list
     except Exception as e:
@@ -203,6 +331,26 @@ def get_wcs_capabilities(url):
         return None, None, None, None
 
 
+def wcs_base_url(url):
+    """
+    Strip the OWS request parameters (e.g. ?SERVICE=WCS&REQUEST=GetCapabilities) that some
+    of the configured layer urls carry, so they can be replaced by a GetCoverage request.
+
+    Args:
+        url (str): The configured WCS url.
+
+    Returns:
+        str: The url without SERVICE, REQUEST or VERSION query parameters.
+    """
+    parts = urlsplit(url)
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query)
+        if k.lower() not in ("service", "request", "version")
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
 def _getFeatures(gdf):
     """
     Internal function to parse features from GeoDataFrame in such a manner that
@@ -215,7 +363,9 @@ def _getFeatures(gdf):
         json object for rasterio to read
     """
     try:
-        return [json.loads(gdf.to_json())["features"][0]["geometry"]]
+        # map the first geometry straight to a GeoJSON-like dict rather than serialising
+        # the whole GeoDataFrame to JSON and parsing it back
+        return [mapping(gdf.geometry.iloc[0])]
     except Exception as e:
         logger.error(f"Error extracting features from GeoDataFrame: {e}", exc_info=True)
         return None
@@ -237,9 +387,8 @@ def _read_file(file):
     """
     try:
         with rasterio.open(file) as src:
-            temp = src.read()
-            dims = temp.shape[0]
-            if dims == 1:
+            # the band count comes from the header, so the raster is only read once
+            if src.count == 1:
                 return src.read(1)
             else:
                 return src.read()
@@ -251,6 +400,53 @@ def _read_file(file):
         return None
 
 
+def _to_dataarray(data, transform, crs):
+    """
+    Wrap a (band, y, x) array on a north-up grid as a rioxarray DataArray with NaN nodata.
+    """
+    bands, height, width = data.shape
+    xs = transform.c + (np.arange(width) + 0.5) * transform.a
+    ys = transform.f + (np.arange(height) + 0.5) * transform.e
+    data_array = xr.DataArray(
+        data,
+        coords={"band": np.arange(1, bands + 1), "y": ys, "x": xs},
+        dims=("band", "y", "x"),
+    )
+    data_array = data_array.rio.write_crs(crs).rio.write_transform(transform)
+    return data_array.rio.write_nodata(np.nan)
+
+
+@lru_cache(maxsize=16)
+def _transformer(src_crs, dst_crs):
+    """
+    Return a pyproj Transformer between two CRS, built once per pair rather than on every
+    to_crs call when the same geometry is reprojected for many files.
+    """
+    return Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+@lru_cache(maxsize=64)
+def _default_grid(src_crs_wkt, dst_crs, width, height, bounds, upscale_factor=1):
+    """
+    Return the (transform, width, height) of a raster's grid in dst_crs, upsampled by
+    upscale_factor, cached for the inputs that share a profile.
+    """
+    dst_transform, dst_width, dst_height = calculate_default_transform(
+        src_crs_wkt, dst_crs, width, height, *bounds
+    )
+    if upscale_factor != 1:
+        dst_transform, dst_width, dst_height = calculate_default_transform(
+            src_crs_wkt,
+            dst_crs,
+            width,
+            height,
+            *bounds,
+            dst_width=dst_width * upscale_factor,
+            dst_height=dst_height * upscale_factor,
+        )
+    return dst_transform, dst_width, dst_height
+
+
 def reproj_mask(
     filename, input_filepath, bbox, out_crscode, output_filepath, resample=False
 ):
@@ -280,53 +476,95 @@ def reproj_mask(
     mask_outpath = os.path.join(output_filepath, masked_filepath)
 
     try:
-        input_raster = rxr.open_rasterio(input_full_filepath)
-
-        # Convert raster to float32 and handle NoData correctly
-        if input_raster.dtype == "uint16":
-            # Assume the original NoData value is known, set it as such or detect it
-            original_nodata = input_raster.rio.nodata
-            input_raster = input_raster.astype("float32")
-            # Replace original NoData with NaN in float32
-            if original_nodata is not None:
-                input_raster = input_raster.where(
-                    input_raster != original_nodata, np.nan
-                )
-
-        if input_raster.rio.crs.to_epsg() != out_crscode:
-            logger.info(
-                f"Reprojecting raster, input crs:{input_raster.rio.crs}, output crs:{out_crscode}"
-            )
-            input_raster = input_raster.rio.reproject(out_crscode)
-
+        geometries = list(bbox.geometry)
         if bbox.crs != out_crscode:
             logger.info(
                 f"Reprojecting geometry, input crs:{bbox.crs}, output crs:{out_crscode}"
             )
-            bbox = bbox.to_crs(out_crscode)
-
-        # Update NoData value for float32 in the metadata
-        input_raster.rio.write_nodata(np.nan, inplace=True)
-
-        # Run pixel resampling if the flag is set to true
-        if resample:
-            upscale_factor = 3
-            new_width = input_raster.rio.width * upscale_factor
-            new_height = input_raster.rio.height * upscale_factor
-            input_raster = input_raster.rio.reproject(
-                input_raster.rio.crs,
-                shape=(int(new_height), int(new_width)),
-                resampling=Resampling.nearest,
+            project = _transformer(bbox.crs.to_wkt(), out_crscode).transform
+            geometries = [shapely_transform(project, geom) for geom in geometries]
+        geom_bounds = (
+            min(g.bounds[0] for g in geometries),
+            min(g.bounds[1] for g in geometries),
+            max(g.bounds[2] for g in geometries),
+            max(g.bounds[3] for g in geometries),
+        )
+
+        with rasterio.open(input_full_filepath, sharing=False) as src:
+            if src.crs.to_epsg() != out_crscode:
+                logger.info(
+                    f"Reprojecting raster, input crs:{src.crs}, output crs:{out_crscode}"
+                )
+
+            # Reproject, resample and clip in a single warp. First work out the output grid
+            # for the whole raster in the target crs (upsampled if the resample flag is set)...
+            dst_transform, dst_width, dst_height = _default_grid(
+                src.crs.to_wkt(),
+                out_crscode,
+                src.width,
+                src.height,
+                tuple(src.bounds),
+                3 if resample else 1,
             )
 
-        # Clip the raster using the geometry, ensuring to invert the mask
-        clipped = input_raster.rio.clip(
-            bbox.geometry, crs=input_raster.rio.crs, all_touched=True
+            # ...then only warp the part of that grid covering both the geometry and the
+            # raster, so a geometry larger than the raster doesn't allocate an all-NaN border
+            window = from_bounds(*geom_bounds, transform=dst_transform)
+            col_off = math.floor(window.col_off)
+            row_off = math.floor(window.row_off)
+            window = Window(
+                col_off,
+                row_off,
+                math.ceil(window.col_off + window.width) - col_off,
+                math.ceil(window.row_off + window.height) - row_off,
+            ).intersection(Window(0, 0, dst_width, dst_height))
+            clip_transform = window_transform(window, dst_transform)
+
+            # The VRT streams source blocks through the warp kernel, converting to float32
+            # and original NoData to NaN on the way, so the source is never held in memory
+            clipped = np.empty(
+                (src.count, window.height, window.width), dtype=np.float32
+            )
+            with WarpedVRT(
+                src,
+                crs=out_crscode,
+                transform=clip_transform,
+                width=window.width,
+                height=window.height,
+                src_nodata=src.nodata,
+                nodata=np.nan,
+                dtype="float32",
+                resampling=Resampling.nearest,
+            ) as vrt:
+                vrt.read(out=clipped)
+
+        # Mask pixels outside the geometry (touched pixels are kept)
+        outside = geometry_mask(
+            geometries,
+            out_shape=(window.height, window.width),
+            transform=clip_transform,
+            all_touched=True,
         )
+        clipped[:, outside] = np.nan
 
-        # Reproject the clipped raster and save
-        reprojected = clipped.rio.reproject(out_crscode)
-        reprojected.rio.to_raster(mask_outpath, tiled=True, dtype="float32")
+        reprojected = _to_dataarray(clipped, clip_transform, out_crscode)
+
+        # Save as a COG (internal 512px tiles, deflate + floating point predictor, overviews)
+        # so downstream readers only fetch the tiles and zoom level they need
+        dst_profile = cog_profiles.get("deflate")
+        dst_profile.update(
+            {"zlevel": 6, "predictor": 3, "blockxsize": 512, "blockysize": 512}
+        )
+        with MemoryFile() as memfile:
+            reprojected.rio.to_raster(memfile.name, driver="GTiff", dtype="float32")
+            cog_translate(
+                memfile.name,
+                mask_outpath,
+                dst_profile,
+                in_memory=True,
+                overview_resampling="average",
+                quiet=True,
+            )
 
         return reprojected
     except Exception as e:
@@ -337,6 +575,78 @@ def reproj_mask(
         return None
 
 
+def _init_reproj_worker():
+    # each worker process runs its own warp, so keep GDAL single threaded to avoid
+    # oversubscribing the cores, and give each one a block cache of its own
+    os.environ["GDAL_NUM_THREADS"] = "1"
+    os.environ["GDAL_CACHEMAX"] = "512"
+
+
+def _reproj_mask_worker(
+    filename, input_filepath, bbox, out_crscode, output_filepath, resample
+):
+    """
+    Run reproj_mask in a worker process and return the file name with its masked file path
+    (or None on failure), so the raster itself doesn't have to be pickled back to the parent process.
+    """
+    reprojected = reproj_mask(
+        filename=filename,
+        input_filepath=input_filepath,
+        bbox=bbox,
+        out_crscode=out_crscode,
+        output_filepath=output_filepath,
+        resample=resample,
+    )
+    if reprojected is None:
+        return filename, None
+    return filename, os.path.join(
+        output_filepath, filename.replace(".tiff", "_masked.tiff")
+    )
+
+
+def reproj_mask_batch(
+    filenames,
+    input_filepath,
+    bbox,
+    out_crscode,
+    output_filepath,
+    resample=False,
+    max_workers=None,
+    chunksize=4,
+):
+    """
+    Run reproj_mask over several raster files in parallel in a process pool.
+
+    Args:
+        filenames (iterable of str): The names of the input raster files. May be a generator, so
+            workers can start on the first files while the rest are still being listed.
+        input_filepath (str): The path to the directory containing the input raster files.
+        bbox (geopandas.GeoDataFrame): The bounding box geometry used for clipping the rasters.
+        out_crscode (str): The CRS code to reproject the rasters to.
+        output_filepath (str): The path to the directory where the masked rasters will be saved.
+        resample (bool, optional): Flag indicating whether to perform pixel resampling. Defaults to False.
+        max_workers (int, optional): Number of worker processes. Defaults to os.cpu_count().
+        chunksize (int, optional): Number of files sent to a worker per task. Defaults to 4.
+
+    Returns:
+        list of tuple: (filename, masked raster path) pairs in input order, with None as the
+        path for files that failed.
+
+    """
+    worker = partial(
+        _reproj_mask_worker,
+        input_filepath=input_filepath,
+        bbox=bbox,
+        out_crscode=out_crscode,
+        output_filepath=output_filepath,
+        resample=resample,
+    )
+    with ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(), initializer=_init_reproj_worker
+    ) as executor:
+        return list(executor.map(worker, filenames, chunksize=chunksize))
+
+
 def colour_geotiff_and_save_cog(input_geotiff, colour_map):
     output_colored_tiff_filename = input_geotiff.replace(".tiff", "_colored.tiff")
     output_cog_filename = input_geotiff.replace(".tiff", "_cog.public.tiff")
@@ -358,24 +668,34 @@ def colour_geotiff_and_save_cog(input_geotiff, colour_map):
                 }
             )
 
-            tif_data = src.read(1, masked=True).astype("float32")
-            tif_formatted = tif_data.filled(np.nan)
-
+            tif_data = src.read(1, masked=True, out_dtype="float32")
+            # nodata and nan pixels are both left uncoloured; blank them in the read buffer
+            # itself so nanmin/nanmax skip them without a filtered copy of the raster
+            invalid = np.ma.getmaskarray(tif_data) | np.isnan(tif_data.data)
+            values = tif_data.data
+            values[invalid] = np.nan
+            min_value, max_value = np.nanmin(values), np.nanmax(values)
+
+            # sample the colormap once into a 256 entry RGB lookup table and index it with the
+            # quantised values, which is the same binning matplotlib applies to normalised input.
+            # The table is band-first, so indexing it gives the (3, H, W) layout rasterio
+            # writes without a transpose.
             cmap = cm.get_cmap(colour_map)
-            na = tif_formatted[~np.isnan(tif_formatted)]
-
-            min_value = min(na)
-            max_value = max(na)
-
-            norm = Normalize(vmin=min_value, vmax=max_value)
-
-            coloured_data = (cmap(norm(tif_formatted))[:, :, :3] * 255).astype(np.uint8)
+            lut = (cmap(np.linspace(0, 1, 256))[:, :3] * 255).astype(np.uint8).T
+            # the scale is float32 so the index buffer stays float32 rather than float64
+            scale = np.float32(
+                256.0 / (max_value - min_value) if max_value > min_value else 0.0
+            )
+            idx = (values - min_value) * scale
+            idx[invalid] = 0
+            np.clip(idx, 0, 255, out=idx)
+            coloured_data = lut[:, idx.astype(np.uint8)]
+            coloured_data[:, invalid] = 0
 
             meta.update({"count": 3})
 
             with rasterio.open(output_colored_tiff_filename, "w", **meta) as dst:
-                reshape = reshape_as_raster(coloured_data)
-                dst.write(reshape)
+                dst.write(coloured_data)
 
         try:
             dst_profile = cog_profiles.get("deflate")
@@ -401,40 +721,57 @@ def colour_geotiff_and_save_cog(input_geotiff, colour_map):
         logger.error(f"Error colorizing GeoTIFF {input_geotiff}: {e}", exc_info=True)
 
 
-def retry_decorator(max_retries=3, backoff_factor=1, retry_statuses=(502, 503)):
+def retry_decorator(
+    max_retries=3, backoff_factor=1, retry_statuses=(502, 503, 504), max_backoff=60
+):
     """
-    A decorator to retry a function if it raises specified HTTP errors.
+    A decorator to retry a function if it raises a transient HTTP or connection error.
+    Waits grow exponentially with attempts (capped at max_backoff) and are jittered so
+    parallel downloads don't retry in lockstep. Any other error, such as an owslib
+    ServiceException or a non-retryable status, is raised straight away.
 
     Args:
-        max_retries (int): The maximum number of retries.
+        max_retries (int): The maximum number of attempts.
         backoff_factor (float): The factor by which the wait time increases.
         retry_statuses (tuple): HTTP status codes that trigger a retry.
+        max_backoff (float): The longest wait between attempts, in seconds.
 
     Returns:
-        function: The wrapped function with retry logic.
+        function: The wrapped function with retry logic. The last error is re-raised
+        once the attempts run out.
     """
 
     def decorator_retry(func):
         @wraps(func)
         # having the func wrapper andt args, kwargs gives access to the function itself and its arguments.
         def wrapper(*args, **kwargs):
-            attempts = 0
-            while attempts < max_retries:
+            for attempt in range(1, max_retries + 1):
                 try:
                     return func(*args, **kwargs)
-                except Exception as e:
-                    if e.response.status_code in retry_statuses:
-                        print(e.response.status_code)
-                        attempts += 1
-                        sleep_time = backoff_factor * (2**attempts)
-                        time.sleep(sleep_time)
-                        logger.error(
-                            f"HTTP error {e.response.status_code} occurred. Retrying."
-                        )
-                    else:
+                except (
+                    requests.ConnectionError,
+                    requests.Timeout,
+                    requests.HTTPError,
+                    # raised directly when a streamed body stalls mid-read
+                    socket.timeout,
+                ) as e:
+                    status = getattr(getattr(e, "response", None), "status_code", None)
+                    if (
+                        isinstance(e, requests.HTTPError)
+                        and status not in retry_statuses
+                    ):
                         raise
-
-            logger.error("Max retries exceeded. Giving up.")
+                    if attempt == max_retries:
+                        logger.error("Max retries exceeded. Giving up.")
+                        raise
+                    sleep_time = min(
+                        max_backoff, backoff_factor * (2**attempt)
+                    ) * random.uniform(0.5, 1.5)
+                    logger.error(
+                        f"Request error ({status or type(e).__name__}) occurred. "
+                        f"Retrying in {sleep_time:.1f}s."
+                    )
+                    time.sleep(sleep_time)
 
         return wrapper
 
@@ -1,7 +1,29 @@
-from .dataframe import get_bbox_from_geodf
-from .meteo import OpenMeteoAPI, convert_epoch_to_timezone, setup_session
-from .stac import (initialize_stac_client, inspect_stac_item,
-                   process_dem_asset, query_stac_api, read_metadata_sidecar,
-                   save_metadata_sidecar)
-from .visualisation import (colour_geotiff_and_save_cog,
-                            get_coords_from_geodataframe)
+import importlib
+
+# Submodules are imported on first use (PEP 562), so importing one helper doesn't pull in
+# rasterio, pystac_client and matplotlib for all the others.
+_LAZY = {
+    "get_bbox_from_geodf": ".dataframe",
+    "initialize_stac_client": ".stac",
+    "inspect_stac_item": ".stac",
+    "process_dem_asset": ".stac",
+    "process_dem_asset_and_mask": ".stac",
+    "process_dem_assets": ".stac",
+    "query_stac_api": ".stac",
+    "colour_geotiff_and_save_cog": ".visualisation",
+    "get_coords_from_geodataframe": ".visualisation",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
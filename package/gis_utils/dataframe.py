@@ -3,9 +3,22 @@ import sys
 from typing import Any, Dict
 
 import geopandas as gpd
+import numpy as np
 
 logger = logging.getLogger()
 
+def _iter_positions(coordinates):
+		"""
+		Yield the [x, y] of each position in arbitrarily nested GeoJSON coordinates. Any z (or m)
+		is dropped, so 2D and 3D positions can be mixed.
+		"""
+		if coordinates and isinstance(coordinates[0], (int, float)):
+				yield coordinates[:2]
+		else:
+				for part in coordinates:
+						yield from _iter_positions(part)
+
+
 def get_bbox_from_geodf(geojson_data: Dict[str, Any]):
 		"""
 		Extract the bounding box from a GeoJSON-like dictionary.
@@ -18,10 +31,26 @@ def get_bbox_from_geodf(geojson_data: Dict[str, Any]):
 		"""
 		if "features" not in geojson_data:
 				raise ValueError("Input dictionary does not contain 'features' key.")
+		if not geojson_data["features"]:
+				raise ValueError("Input dictionary contains no features to take a bounding box from.")
 		
 		try:
-			gdf = gpd.GeoDataFrame.from_features(geojson_data["features"])
-			bbox = list(gdf.total_bounds)
+			# read the bounds straight off the coordinate arrays instead of building a shapely
+			# geometry for every feature; anything without plain coordinates (e.g. a
+			# GeometryCollection) goes through geopandas instead
+			coords = []
+			for feature in geojson_data["features"]:
+				geometry = feature.get("geometry")
+				if geometry is None:
+					continue
+				if "coordinates" not in geometry:
+					gdf = gpd.GeoDataFrame.from_features(geojson_data["features"])
+					return list(gdf.total_bounds)
+				coords.extend(_iter_positions(geometry["coordinates"]))
+			if not coords:
+				raise ValueError("no feature has a geometry with coordinates")
+			arr = np.asarray(coords, dtype=float)
+			bbox = [*arr.min(axis=0), *arr.max(axis=0)]
 			return bbox
 		except Exception as e:
 				logger.error("Failed to extract bounding box from GeoJSON data")
@@ -2,15 +2,46 @@ import json
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 
 import numpy as np  # added to use nan for masking.
 import pystac_client
 import rasterio
-import rasterio.mask  # added for masking/cliping rasters
+from rasterio.features import geometry_mask, geometry_window
 from rasterio.windows import from_bounds
 
 logger = logging.getLogger()
 
+# GDAL options for reading COGs over HTTP: don't list the remote directory or probe for
+# .aux.xml/.ovr/.msk sidecars on open, multiplex range requests over HTTP/2 and keep
+# fetched blocks in memory.
+REMOTE_COG_ENV = {
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    'CPL_VSIL_CURL_ALLOWED_EXTENSIONS': '.tif,.tiff,.vrt',
+    'GDAL_HTTP_MULTIPLEX': 'YES',
+    'GDAL_HTTP_VERSION': '2',
+    'VSI_CACHE': 'TRUE',
+    'VSI_CACHE_SIZE': '536870912',
+    'GDAL_CACHEMAX': 512
+}
+
+def _tiled_profile(dtype):
+    """
+    Creation options for writing outputs as internally tiled, deflate compressed GeoTIFFs, so
+    later windowed reads only decode the tiles they touch.
+    """
+    return {
+        'driver': 'GTiff',
+        'tiled': True,
+        'blockxsize': 512,
+        'blockysize': 512,
+        'compress': 'deflate',
+        # floating point predictor for float data, horizontal differencing for integers
+        'predictor': 3 if np.issubdtype(np.dtype(dtype), np.floating) else 2,
+        'BIGTIFF': 'IF_SAFER'
+    }
+
 def initialize_stac_client(stac_url):
     """
     Initialize and return a STAC client for a given STAC API URL.
@@ -31,7 +62,26 @@ def initialize_stac_client(stac_url):
         raise
 
 
-def query_stac_api(client, bbox, collections, start_date=None, end_date=None, limit=10):
+def _split_date_range(start_date, end_date, parts):
+    """
+    Split an inclusive YYYY-MM-DD date range into up to `parts` consecutive, non-overlapping
+    "start/end" datetime strings.
+    """
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    days = (end - start).days + 1
+    parts = max(1, min(parts, days))
+    step = days / parts
+    ranges = []
+    for i in range(parts):
+        sub_start = start + timedelta(days=round(i * step))
+        sub_end = start + timedelta(days=round((i + 1) * step) - 1)
+        ranges.append(f"{sub_start.isoformat()}/{sub_end.isoformat()}")
+    return ranges
+
+
+def query_stac_api(client, bbox, collections, start_date=None, end_date=None, limit=None,
+                   page_size=1000, max_workers=1, raw=False):
     """
     Query a STAC API for items within a bounding box and date range for specific collections.
     
@@ -41,22 +91,35 @@ def query_stac_api(client, bbox, collections, start_date=None, end_date=None, li
     - collections (list): A list of collection IDs to include in the query.
     - start_date (str, optional): The start date for the query (YYYY-MM-DD). Defaults to None.
     - end_date (str, optional): The end date for the query (YYYY-MM-DD). Defaults to None.
-    - limit (int): Maximum number of items to return.
+    - limit (int, optional): Maximum number of items to return. Defaults to None (all matches).
+    - page_size (int): Number of items requested per page. Large pages keep pagination round-trips
+      down; servers cap this at their own maximum. Defaults to 1000.
+    - max_workers (int): When above 1 and a date range is given, the range is split into this many
+      sub-ranges which are searched concurrently. Defaults to 1.
+    - raw (bool): If True, return the items as plain dicts instead of pystac Items, which skips
+      building the Item objects when only hrefs or bboxes are needed. Defaults to False.
     
     Returns:
-    - A list of STAC Items that match the query parameters.
+    - A list of STAC Items (or item dicts if raw) that match the query parameters.
     """
+    def _search(datetime_range):
+        search = client.search(bbox=bbox, collections=collections, datetime=datetime_range,
+                               limit=page_size, max_items=limit)
+        return list(search.items_as_dicts() if raw else search.items())
+
     try: 
-        search_params = {
-            "bbox": bbox,
-            "collections": collections,
-            "limit": limit
-        }
-        if start_date and end_date:
-            search_params["datetime"] = f"{start_date}/{end_date}"
-        
-        search = client.search(**search_params)
-        items = list(search.items())
+        if start_date and end_date and max_workers > 1:
+            date_ranges = _split_date_range(start_date, end_date, max_workers)
+            # the searches are network-bound, so threads overlap the page requests
+            with ThreadPoolExecutor(max_workers=len(date_ranges)) as executor:
+                results = list(executor.map(_search, date_ranges))
+            items = [item for result in results for item in result]
+            if limit is not None:
+                items = items[:limit]
+        elif start_date and end_date:
+            items = _search(f"{start_date}/{end_date}")
+        else:
+            items = _search(None)
         print(f"Found {len(items)} items")
         return items
     except Exception:
@@ -126,7 +189,7 @@ def process_dem_asset(dem_asset, bbox, output_tiff_filename):
         print(f"Opening DEM asset from: {dem_asset.href}")
         data, metadata = None, {}
 
-        with rasterio.open(dem_asset.href) as src:
+        with rasterio.Env(**REMOTE_COG_ENV), rasterio.open(dem_asset.href) as src:
             window = from_bounds(*bbox, transform=src.transform)
             data = src.read(window=window)
 
@@ -137,6 +200,7 @@ def process_dem_asset(dem_asset, bbox, output_tiff_filename):
                 'width': window.width,
                 'transform': rasterio.windows.transform(window, src.transform)
             })
+            metadata.update(_tiled_profile(metadata['dtype']))
 
             # Ensure the directory exists
             output_directory = os.path.dirname(output_tiff_filename)
@@ -160,6 +224,29 @@ def process_dem_asset(dem_asset, bbox, output_tiff_filename):
         print(f"Failed to process DEM asset: {e}")
         raise
     
+def process_dem_assets(dem_assets, bbox, output_dir, max_workers=16):
+    """
+    Process several DEM assets concurrently with `process_dem_asset`, one output file per asset.
+
+    Parameters:
+    - dem_assets (list): STAC asset objects containing the hrefs to the DEM files.
+    - bbox (tuple): The bounding box for the region to extract (min_lon, min_lat, max_lon, max_lat).
+    - output_dir (str): The directory the output TIFF files are written to, named after each asset file.
+    - max_workers (int): Number of assets read at the same time. Defaults to 16.
+
+    Returns:
+    - A list of the output file paths, in the order of `dem_assets`.
+    """
+    output_filenames = [
+        os.path.join(output_dir, os.path.splitext(os.path.basename(asset.href.split('?')[0]))[0] + '.tif')
+        for asset in dem_assets
+    ]
+    # each read mostly waits on range requests, and GDAL releases the GIL while it does, so
+    # threads overlap the round-trips of the different assets
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(dem_assets)))) as executor:
+        list(executor.map(process_dem_asset, dem_assets, [bbox] * len(dem_assets), output_filenames))
+    return output_filenames
+
 def process_dem_asset_and_mask(dem_asset, geometry, bbox, output_tiff_filename, masked=True):
     """
     Process a DEM asset by reading a specific region defined by a bounding box and writing it to a new file.
@@ -179,12 +266,28 @@ def process_dem_asset_and_mask(dem_asset, geometry, bbox, output_tiff_filename,
         print(f"Opening DEM asset from: {dem_asset.href}")
         data, metadata = None, {}
 
-        with rasterio.open(dem_asset.href) as src:
-            # Nodata value here is being set to 0. This works for DEM but is not OK for indices.
-            data, out_transform = rasterio.mask.mask(src, geometry, crop=True, nodata=np.nan)
-            
-            #window = from_bounds(*bbox, transform=src.transform)
-            #data = src.read(window=window)
+        with rasterio.Env(**REMOTE_COG_ENV), rasterio.open(dem_asset.href) as src:
+            # Only read the window covering the geometry, so a small area over a large remote
+            # COG fetches just the tiles it needs rather than the whole intersected extent.
+            # geometry_window widens to whole pixels (as mask(crop=True) does), so edge pixels
+            # the geometry touches are kept, and clips to the raster.
+            window = geometry_window(src, geometry)
+            out_transform = rasterio.windows.transform(window, src.transform)
+            # Integer DEMs stay integer with a sentinel nodata (the source's own, or the dtype
+            # minimum) rather than doubling in size as float; float data is read straight into
+            # float32 with nan as nodata.
+            if np.issubdtype(np.dtype(src.dtypes[0]), np.integer):
+                out_dtype = src.dtypes[0]
+                nodata = src.nodata if src.nodata is not None else np.iinfo(out_dtype).min
+            else:
+                out_dtype, nodata = 'float32', np.nan
+            data = src.read(window=window, out_dtype=out_dtype)
+
+            if masked:
+                # True inside the geometry, nodata everywhere else
+                inside = geometry_mask(geometry, out_shape=(window.height, window.width),
+                                       transform=out_transform, invert=True)
+                data[:, ~inside] = nodata
 
             # Extract required metadata or other information from src
             metadata = src.meta.copy()
@@ -193,8 +296,11 @@ def process_dem_asset_and_mask(dem_asset, geometry, bbox, output_tiff_filename,
             metadata.update({
                 'height': data.shape[1],
                 'width': data.shape[2],
-                'transform': out_transform
+                'transform': out_transform,
+                'dtype': out_dtype,
+                'nodata': nodata
             })
+            metadata.update(_tiled_profile(out_dtype))
             
             # Ensure the directory exists
             output_directory = os.path.dirname(output_tiff_filename)
@@ -1,31 +1,80 @@
-import json
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 import numpy as np
 import rasterio
 from matplotlib import cm
-from matplotlib.colors import Normalize
 from rasterio.io import MemoryFile
-from rasterio.plot import reshape_as_raster
+from rasterio.vrt import WarpedVRT
 from rasterio.warp import calculate_default_transform  # reproject, Resampling
+from rasterio.windows import Window
 from rio_cogeo.cogeo import cog_translate
 from rio_cogeo.profiles import cog_profiles
+from shapely.geometry import mapping
 
 logger = logging.getLogger()
 
 
 def get_coords_from_geodataframe(gdf):
     """Function to parse features from GeoDataFrame in such a manner that rasterio wants them"""
-    return [json.loads(gdf.to_json())['features'][0]['geometry']]
+    return [mapping(gdf.geometry.iloc[0])]
 
 
-def colour_geotiff_and_save_cog(input_geotiff, colour_map):
-    
-    output_colored_tiff_filename = input_geotiff.replace('.tiff', '_colored.tiff')
-    output_cog_filename = input_geotiff.replace('.tiff', '_cog.public.tiff')
-    
+@lru_cache(maxsize=32)
+def _get_lut(colour_map):
+    """
+    Return the band-first (3, 256) uint8 RGB lookup table for a matplotlib colormap name, built
+    once per colormap. The table is read-only since it is shared between calls.
+    """
+    cmap = cm.get_cmap(colour_map) #can also use 'terrain' cmap to keep this the same as the preview image from above.
+    lut = (cmap(np.linspace(0, 1, 256))[:, :3] * 255).astype(np.uint8).T.copy()
+    lut.setflags(write=False)
+    return lut
+
+
+def _read_block(src, window=None):
+    """
+    Read a window of band 1 as float32 along with its boolean validity mask, which is True where
+    the band's mask (nodata or internal mask) marks the pixel as data and the value is finite.
+    """
+    data = src.read(1, window=window, out_dtype='float32')
+    valid = src.read_masks(1, window=window) != 0
+    # nan and inf are folded into the mask once here, so neither pass has to test for them
+    np.logical_and(valid, np.isfinite(data), out=valid)
+    return data, valid
+
+
+def _tile_windows(width, height, size=512):
+    """Yield the size x size windows tiling a width x height grid, matching the output's blocks."""
+    for row_off in range(0, height, size):
+        for col_off in range(0, width, size):
+            yield Window(col_off, row_off, min(size, width - col_off), min(size, height - row_off))
+
+
+def _colour_block(block, valid, lut, min_value, scale):
+    """
+    Map a float32 block to (3, H, W) uint8 colours through a band-first (3, 256) lookup table,
+    which is already the layout rasterio writes. Invalid pixels are left black.
+    """
+    invalid = ~valid
+    # quantise in place in the (owned) float32 block, so the only new buffer is the uint8 index
+    np.subtract(block, min_value, out=block)
+    np.multiply(block, scale, out=block)
+    block[invalid] = 0
+    np.clip(block, 0, 255, out=block)
+    coloured = lut[:, block.astype(np.uint8)]
+    coloured[:, invalid] = 0
+    return coloured
+
+
+def _colour_to_memfile(input_geotiff, colour_map, max_workers=None):
+    """
+    Warp a single band GeoTIFF to EPSG:4326 and colour it into an RGB GeoTIFF held in a
+    MemoryFile, which the caller is responsible for closing.
+    """
     with rasterio.open(input_geotiff) as src:
         meta = src.meta.copy()
         dst_crs = rasterio.crs.CRS.from_epsg(4326) #change so not hardcoded?
@@ -40,43 +89,121 @@ def colour_geotiff_and_save_cog(input_geotiff, colour_map):
             'height': height
         })
 
-        tif_data = src.read(1, masked=True).astype('float32') #setting masked=True here tells rasterio to use masking information if present, but we need to add the mask itself first.
-        tif_formatted = tif_data.filled(np.nan)
+        # Both passes read through a WarpedVRT on the output grid, so the colours land where the
+        # output's crs and transform say they are; nearest keeps the values being coloured exact.
+        # The band is processed one 512 x 512 output tile at a time, so rasters larger than
+        # memory can be coloured.
+        with WarpedVRT(src, crs=dst_crs, transform=transform, width=width, height=height) as vrt:
+            windows = list(_tile_windows(width, height))
 
-        cmap = cm.get_cmap(colour_map) #can also use 'terrain' cmap to keep this the same as the preview image from above.
-        na = tif_formatted[~np.isnan(tif_formatted)]
+            # First pass: the colour range over the valid pixels; a block with no valid pixels
+            # leaves the running value unchanged.
+            min_value, max_value = np.float32(np.inf), np.float32(-np.inf)
+            for window in windows:
+                block, valid = _read_block(vrt, window)
+                min_value = np.minimum.reduce(block, axis=None, where=valid, initial=min_value)
+                max_value = np.maximum.reduce(block, axis=None, where=valid, initial=max_value)
 
-        min_value = min(na)
-        max_value = max(na)
+            # Look each pixel up in the colormap's 256 entry uint8 RGB table by its quantised
+            # value, instead of building a float64 RGBA array through Normalize. This is the same
+            # binning matplotlib applies to normalised input; nan pixels stay black.
+            lut = _get_lut(colour_map)
+            scale = np.float32(256.0 / (max_value - min_value) if max_value > min_value else 0.0)
 
-        norm = Normalize(vmin=min_value, vmax=max_value)
+            # the output holds the uint8 colours written below, so no cast on write; 0 is the
+            # black left in empty pixels
+            meta.update({
+                'count': 3,
+                'dtype': 'uint8',
+                'nodata': 0,
+                'photometric': 'rgb',
+                'interleave': 'pixel',
+                'tiled': True,
+                'blockxsize': 512,
+                'blockysize': 512
+            })
 
-        coloured_data = (cmap(norm(tif_formatted))[:, :, :3] * 255).astype(np.uint8)
+            # The coloured intermediate only feeds cog_translate, so it is kept in a MemoryFile
+            # rather than written to disk and read straight back.
+            mem_dst = MemoryFile()
 
-        meta.update({"count":3})
+            # Second pass: colour each block and write it to the same window of the output. The
+            # LUT lookup is numpy C code that releases the GIL, so blocks are coloured on a thread
+            # pool. A dataset handle isn't safe to share between threads, so reads and writes stay
+            # on this thread, and blocks go out in batches to bound how many are held in memory.
+            max_workers = max_workers or os.cpu_count() or 1
+            batch_size = 2 * max_workers
+            try:
+                with mem_dst.open(**meta) as dst, ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    for start in range(0, len(windows), batch_size):
+                        batch = windows[start:start + batch_size]
+                        futures = [
+                            executor.submit(_colour_block, *_read_block(vrt, window), lut, min_value, scale)
+                            for window in batch
+                        ]
+                        for window, future in zip(batch, futures):
+                            dst.write(future.result(), window=window)
+            except Exception:
+                mem_dst.close()
+                raise
 
+    return mem_dst
 
-        with rasterio.open(output_colored_tiff_filename, 'w', **meta) as dst:
-            reshape = reshape_as_raster(coloured_data)
-            dst.write(reshape)
+
+def colour_geotiff_and_save_cog(input_geotiff, colour_map, cog_profile='webp', quality=85, max_workers=None,
+                                overview_resampling='average'):
+    """
+    Colour a single band GeoTIFF with a matplotlib colormap and save it as an RGB COG.
+
+    Parameters:
+    - input_geotiff (str): The path to the input GeoTIFF file.
+    - colour_map (str): The name of the matplotlib colormap.
+    - cog_profile (str): The rio-cogeo profile for the COG, e.g. 'webp', 'jpeg' or 'deflate'. Defaults to 'webp'.
+    - quality (int): Compression quality for the lossy 'webp' and 'jpeg' profiles. Defaults to 85.
+    - max_workers (int): Number of threads colouring blocks. Defaults to the number of CPUs.
+    - overview_resampling (str): Resampling used for the COG overviews. Defaults to 'average'.
+
+    Returns:
+    - str: The path to the saved COG.
+    """
+    
+    output_cog_filename = input_geotiff.replace('.tiff', '_cog.public.tiff')
+
+    try:
+        mem_dst = _colour_to_memfile(input_geotiff, colour_map, max_workers)
+    except Exception as e:
+        raise RuntimeError(f'Unable to colour {input_geotiff}') from e
 
     try:
-        dst_profile = cog_profiles.get('deflate')
-        with MemoryFile() as mem_dst:
-            cog_translate(
-                output_colored_tiff_filename,
-                output_cog_filename,
-                config=dst_profile,
-                in_memory=True,
-                dtype="uint8",
-                add_mask=False,
-                nodata=0,
-                dst_kwargs=dst_profile
-            )
+        with mem_dst:
+            # The coloured output is for display, so by default it is stored with lossy WebP, which
+            # is several times smaller and faster to encode than DEFLATE on RGB. WebP and JPEG can't
+            # keep a nodata value exact, so for those the empty (0) pixels go to an internal mask.
+            dst_profile = cog_profiles.get(cog_profile)
+            lossy = cog_profile in ('webp', 'jpeg')
+            if lossy:
+                # GDAL spells the option per codec: WEBP_LEVEL for WebP, JPEG_QUALITY for JPEG
+                dst_profile.update({'webp_level' if cog_profile == 'webp' else 'jpeg_quality': quality})
+            else:
+                dst_profile.update({'predictor': 2})
+            with mem_dst.open() as coloured:
+                cog_translate(
+                    coloured,
+                    output_cog_filename,
+                    config=dst_profile,
+                    in_memory=True,
+                    dtype="uint8",
+                    add_mask=lossy,
+                    nodata=0,
+                    # cog_translate builds the power-of-two overviews itself; average keeps zoomed-out
+                    # views smooth instead of the speckle of the default nearest
+                    overview_resampling=overview_resampling,
+                    dst_kwargs=dst_profile
+                )
         return output_cog_filename
         
-    except:
-        raise Exception('Unable to convert to cog')
+    except Exception as e:
+        raise RuntimeError(f'Unable to convert {input_geotiff} to COG') from e
     
 
 def get_geotiff_statistics(input_geotiff):
@@ -98,15 +225,35 @@ def get_geotiff_statistics(input_geotiff):
         data = src.read(1)  # Read the first band
         mask = src.dataset_mask()  # Get the mask of the dataset
 
-        # Apply the mask
-        masked_data = np.ma.masked_array(data, mask=(mask == 0))
+        # Keep only the valid pixels, as one contiguous plain array, so each statistic runs as a
+        # regular NumPy reduction rather than through the masked array routines (np.ma.median
+        # is especially slow).
+        valid_mask = mask != 0
+        n = int(np.count_nonzero(valid_mask))
+        lo, hi = (n - 1) // 2, n // 2
+        kth = sorted({0, lo, hi, n - 1})
 
-        # Get statistics excluding masked pixels
-        min_val = float(masked_data.min())
-        max_val = float(masked_data.max())
-        mean_val = float(masked_data.mean())
-        median_val = float(np.ma.median(masked_data))
-        std_val = float(masked_data.std())
+        # Get statistics excluding masked pixels. One partition puts the min, max and middle
+        # element(s) in place, giving three of the statistics from a single selection pass
+        # instead of separate min, max and median passes. The boolean-indexed copy is
+        # partitioned in place; a fully valid band is used as is by np.partition's own copy.
+        if n == 0:
+            part = None
+        elif n == data.size:
+            part = np.partition(data.ravel(), kth)
+        else:
+            part = data[valid_mask]
+            part.partition(kth)
+        if part is None or np.isnan(part[-1]):
+            # no valid pixels, or a nan (which sorts last): like the NumPy reductions on an
+            # empty or nan-containing array, every statistic is nan
+            min_val = max_val = mean_val = median_val = std_val = float('nan')
+        else:
+            min_val = float(part[0])
+            max_val = float(part[-1])
+            median_val = (float(part[lo]) + float(part[hi])) / 2
+            mean_val = float(part.mean(dtype=np.float64))
+            std_val = float(part.std(dtype=np.float64))
 
         stats = {
         "min": min_val,
@@ -0,0 +1,62 @@
+import numpy as np
+import rasterio
+from rasterio.transform import array_bounds, from_origin
+from rasterio.warp import Resampling, calculate_default_transform, reproject
+
+from gis_utils.visualisation import _get_lut, colour_geotiff_and_save_cog, get_geotiff_statistics
+
+
+def _expected_colours(data, src_crs, src_transform, nodata, colour_map):
+    """Reproject with GDAL directly and colour the result as matplotlib would bin it."""
+    height, width = data.shape
+    transform, dst_width, dst_height = calculate_default_transform(
+        src_crs, 'EPSG:4326', width, height, *array_bounds(height, width, src_transform)
+    )
+    warped = np.full((dst_height, dst_width), np.nan, dtype='float32')
+    reproject(
+        data, warped,
+        src_transform=src_transform, src_crs=src_crs, src_nodata=nodata,
+        dst_transform=transform, dst_crs='EPSG:4326', dst_nodata=np.nan,
+        resampling=Resampling.nearest
+    )
+    valid = np.isfinite(warped)
+    low, high = warped[valid].min(), warped[valid].max()
+    index = np.zeros(warped.shape, dtype=np.uint8)
+    index[valid] = np.clip((warped[valid] - low) * np.float32(256.0 / (high - low)), 0, 255)
+    colours = _get_lut(colour_map)[:, index]
+    colours[:, ~valid] = 0
+    return transform, colours
+
+
+def test_colour_geotiff_reprojects_non_4326_input(tmp_path):
+    input_geotiff = str(tmp_path / 'mercator.tiff')
+    data = np.random.default_rng(0).normal(size=(700, 900)).astype('float32')
+    data[:30] = -9999
+    src_transform = from_origin(16700000, -3500000, 100, 100)
+    with rasterio.open(
+        input_geotiff, 'w', driver='GTiff', width=900, height=700, count=1, dtype='float32',
+        crs='EPSG:3857', transform=src_transform, nodata=-9999
+    ) as dst:
+        dst.write(data, 1)
+
+    output_cog = colour_geotiff_and_save_cog(input_geotiff, 'viridis', cog_profile='deflate')
+
+    transform, expected = _expected_colours(data, 'EPSG:3857', src_transform, -9999, 'viridis')
+    with rasterio.open(output_cog) as src:
+        assert src.crs.to_epsg() == 4326
+        assert src.transform.almost_equals(transform)
+        np.testing.assert_array_equal(src.read(), expected)
+
+
+def test_geotiff_statistics_without_valid_pixels_are_nan(tmp_path):
+    input_geotiff = str(tmp_path / 'empty.tiff')
+    with rasterio.open(
+        input_geotiff, 'w', driver='GTiff', width=5, height=5, count=1, dtype='float32',
+        crs='EPSG:4326', transform=from_origin(150, -30, 0.01, 0.01), nodata=-9999
+    ) as dst:
+        dst.write(np.full((1, 5, 5), -9999, dtype='float32'))
+
+    stats = get_geotiff_statistics(input_geotiff)
+
+    assert set(stats) == {'min', 'max', 'mean', 'median', 'std'}
+    assert all(np.isnan(value) for value in stats.values())